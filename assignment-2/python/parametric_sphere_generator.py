@@ -1,12 +1,22 @@
 """A command line script to generate parametric spheres in maya"""
 
 import argparse
-import math
+import sys
+from pathlib import Path
 
-import maya.standalone
+# Sphere math and scene building are shared with the other sphere tools
+sys.path.append(str(Path(__file__).resolve().parents[2] / "common" / "python"))
+from maya_ascii import MayaAsciiScene
+from parametric_sphere import build_parametric_sphere
 
-maya.standalone.initialize()
-import maya.cmds
+
+def start_maya():
+    """
+    Starts maya.standalone. Only needed to build in Maya, which takes several seconds,
+    so the 'ascii' backend never calls it.
+    """
+    import maya.standalone
+    maya.standalone.initialize()
 
 
 def save(filename="example"):
@@ -15,36 +25,27 @@ def save(filename="example"):
 
     :param filename: Name of the file to save. Extension ".ma" is added automatically.
     """
+    import maya.cmds
     maya.cmds.file(rename=filename + ".ma")
     print(f"Saving to: \'{maya.cmds.file(save=True, type='mayaAscii')}\'")
 
 
-def create_parametric_sphere(radius, step_size):
+def create_parametric_sphere(radius, step_size, scene=None):
     """
     Generates a parametric sphere out of default cubes. Centered at the origin.
-    Parametric sphere equation: https://external-content.duckduckgo.com/iu/?u=http%3A%2F%2Fwww.songho.ca%2Fopengl%2Ffiles%2Fgl_sphere01.png&f=1&nofb=1&ipt=9cbb49b70493462ee88c03662117bd09799c84ccdae76ded3fe82271a91ec09d&ipo=images
+    See parametric_sphere.build_parametric_sphere.
 
     :param radius: Radius of the generated sphere.
     :param step_size: Size of each step around sphere in degrees. A higher value yields
         a lower resolution.
+    :param scene: Scene to build in. Defaults to the open Maya scene.
+    :return: Tuple of the group and the list of cube transforms
     """
     print("Creating a parametric sphere...")
-
-    # Loop through positions on a sphere
-    # Phi is latitude, theta is longitude
-    for phi in range(-90, 91, step_size):
-        for theta in range(0, 360, step_size):
-            # Convert phi and theta to radians
-            t, p = math.radians(theta), math.radians(phi)
-
-            # Calculate position
-            pos = radius * math.cos(p) * math.cos(t), \
-                  radius * math.sin(p), \
-                  radius * math.cos(p) * math.sin(t)
-
-            # Generate and move cube
-            maya.cmds.polyCube()
-            maya.cmds.move(*pos)
+    if scene is None:
+        from maya_scene import MayaScene
+        scene = MayaScene()
+    return build_parametric_sphere(radius, step_size, scene)
 
 
 if __name__ == '__main__':
@@ -55,10 +56,23 @@ if __name__ == '__main__':
                         help="Size of each step around sphere in degrees. "
                              "A higher value yields a lower resolution.",
                         type=int, default=24)
+    parser.add_argument("-backend",
+                        help="Build the scene in Maya, or write the .ma file directly "
+                             "without starting Maya.",
+                        choices=["maya", "ascii"], default="maya")
     args = parser.parse_args()
 
-    create_parametric_sphere(args.radius, args.step_size)
+    if args.backend == "ascii":
+        with MayaAsciiScene("example.ma") as ascii_scene:
+            create_parametric_sphere(args.radius, args.step_size, ascii_scene)
+        print("Done!")
+        print(f"Saving to: \'{ascii_scene.path}\'")
+    else:
+        start_maya()
+        import maya.cmds
+
+        create_parametric_sphere(args.radius, args.step_size)
 
-    print(maya.cmds.ls(geometry=True))
-    print("Done!")
-    save()
+        print(maya.cmds.ls(geometry=True))
+        print("Done!")
+        save()
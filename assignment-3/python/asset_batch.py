@@ -0,0 +1,175 @@
+"""Creates the directories and empty group scenes of many assets at once, from a manifest"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from asset_dir_creator import get_scene_dir
+from scene_creator import save_empty_group_scene, start_maya, write_empty_group_scene
+
+cmds = None  # maya.cmds of this process's Maya session, once started
+
+
+def read_manifest(path):
+    """
+    Reads the asset names of a manifest. A .json manifest is a list of names, a list of
+    objects with an "asset" key, or an object with such a list under "assets". A .csv
+    manifest has a name per row, in the "asset" column if there is a header with one,
+    otherwise in the first column.
+
+    :param path: Path of the manifest.
+    :return: List of the asset names, without blanks or duplicates, in manifest order.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.lower().endswith(".json"):
+            entries = json.load(file)
+            if isinstance(entries, dict):
+                entries = entries["assets"]
+            names = [entry["asset"] if isinstance(entry, dict) else entry
+                     for entry in entries]
+        else:
+            rows = [row for row in csv.reader(file) if row]
+            header = [cell.strip().lower() for cell in rows[0]] if rows else []
+            column = header.index("asset") if "asset" in header else 0
+            names = [row[column] for row in rows[1 if "asset" in header else 0:]
+                     if len(row) > column]
+    names = [str(name).strip() for name in names]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def check_asset_name(asset_name):
+    """
+    :param asset_name: Name of an asset.
+    :return: Why the name can't be used as a directory name, or None if it can.
+    """
+    if asset_name in (".", "..") or any(sep in asset_name for sep in "/\\"):
+        return "Not a valid directory name"
+    return None
+
+
+def create_asset_dirs(assets, root="assets"):
+    """
+    Creates the scene directory of every asset in one pass. Directories that already
+    exist are kept.
+
+    :param assets: Names of the assets.
+    :param root: Directory to create the assets in.
+    :return: Dictionary of each asset to its error, or None if its directory was
+        created.
+    """
+    errors = {}
+    for asset_name in assets:
+        errors[asset_name] = check_asset_name(asset_name)
+        if errors[asset_name] is None:
+            try:
+                os.makedirs(get_scene_dir(asset_name, root), exist_ok=True)
+            except OSError as err:
+                errors[asset_name] = str(err)
+    return errors
+
+
+def start_session(backend):
+    """
+    Starts Maya once for every scene this process saves. The ascii backend needs no
+    session.
+
+    :param backend: "maya" or "ascii".
+    """
+    global cmds
+    if backend == "maya" and cmds is None:
+        cmds = start_maya()
+
+
+def create_scene(asset_name, root, backend):
+    """
+    Saves the empty group scene of an asset in this process's session.
+
+    :param asset_name: Name of the asset.
+    :param root: Directory the assets are in.
+    :param backend: "maya" or "ascii".
+    :return: Tuple of the asset name and its error, or None if the scene was saved.
+    """
+    filename = os.path.join(get_scene_dir(asset_name, root), asset_name + ".ma")
+    try:
+        if backend == "ascii":
+            write_empty_group_scene(filename)
+        else:
+            save_empty_group_scene(cmds, filename)
+    except (OSError, RuntimeError) as err:
+        return asset_name, str(err)
+    return asset_name, None
+
+
+def create_scenes(assets, root="assets", backend="maya", workers=1):
+    """
+    Saves the empty group scene of every asset, in a single Maya session, or spread over
+    a pool of sessions that are each started once.
+
+    :param assets: Names of the assets. Their directories must exist.
+    :param root: Directory the assets are in.
+    :param backend: "maya" to save with Maya, "ascii" to write the .ma files directly.
+    :param workers: Number of sessions. 1 saves every scene in this process.
+    :return: Dictionary of each asset to its error, or None if its scene was saved.
+    """
+    if workers <= 1 or len(assets) <= 1:
+        start_session(backend)
+        return dict(create_scene(asset_name, root, backend) for asset_name in assets)
+
+    chunk_size = max(1, len(assets) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=start_session,
+                             initargs=(backend,)) as pool:
+        return dict(pool.map(create_scene, assets, repeat(root), repeat(backend),
+                             chunksize=chunk_size))
+
+
+def bootstrap_assets(assets, root="assets", backend="maya", workers=1):
+    """
+    Creates the directories of every asset, then the scenes of the assets whose
+    directory was created.
+
+    :param assets: Names of the assets.
+    :param root: Directory to create the assets in.
+    :param backend: "maya" or "ascii". See create_scenes.
+    :param workers: Number of Maya sessions. See create_scenes.
+    :return: Dictionary of each asset to its error, or None if it succeeded.
+    """
+    errors = create_asset_dirs(assets, root)
+    created = [asset_name for asset_name in assets if errors[asset_name] is None]
+    errors.update(create_scenes(created, root, backend, workers))
+    return errors
+
+
+def print_report(errors):
+    """
+    Prints whether each asset succeeded, then the number of failures.
+
+    :param errors: Dictionary of each asset to its error, or None if it succeeded.
+    """
+    for asset_name, error in errors.items():
+        print(f"{asset_name}: {'Failed - ' + error if error else 'Done'}")
+    failed = sum(error is not None for error in errors.values())
+    print(f"Created {len(errors) - failed} of {len(errors)} assets, {failed} failed")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This script creates the directory and empty group scene of every "
+                    "asset in a manifest.")
+    parser.add_argument("manifest", help="CSV or JSON file listing the assets.", type=str)
+    parser.add_argument("-root", help="Directory to create the assets in.", type=str,
+                        default="assets")
+    parser.add_argument("-backend", help="Save the scenes with Maya, or write the .ma "
+                                         "files directly without starting Maya.",
+                        choices=["maya", "ascii"], default="maya")
+    parser.add_argument("-workers", help="Number of Maya sessions to save scenes in.",
+                        type=int, default=1)
+    args = parser.parse_args()
+
+    results = bootstrap_assets(read_manifest(args.manifest), args.root, args.backend,
+                               args.workers)
+    print_report(results)
+    sys.exit(1 if any(results.values()) else 0)
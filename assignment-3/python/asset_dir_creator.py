@@ -2,8 +2,19 @@
 
 import os
 
-asset_name = os.getenv('asset')
 
-scene_path = os.path.join("assets", asset_name, "maya", "scenes")
-print(f"Creating directory: '{scene_path}'")
-os.makedirs(scene_path)
+def get_scene_dir(asset_name, root="assets"):
+    """
+    :param asset_name: Name of the asset.
+    :param root: Directory the assets are in.
+    :return: Path of the directory of the asset's maya scenes.
+    """
+    return os.path.join(root, asset_name, "maya", "scenes")
+
+
+if __name__ == '__main__':
+    asset_name = os.getenv('asset')
+
+    scene_path = get_scene_dir(asset_name)
+    print(f"Creating directory: '{scene_path}'")
+    os.makedirs(scene_path)
@@ -2,10 +2,54 @@
 
 import os
 import argparse
-import maya.standalone
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "common" / "python"))
+from maya_ascii import MayaAsciiScene
+
+
+def start_maya():
+    """
+    Starts maya.standalone, which takes several seconds. Start it once per process and
+    save every scene in the same session.
+
+    :return: The maya.cmds module.
+    """
+    import maya.standalone
+
+    maya.standalone.initialize()
+    import maya.cmds
+    return maya.cmds
+
+
+def save_empty_group_scene(cmds, filename):
+    """
+    Saves a new scene with an empty group with Maya. The open scene is discarded first,
+    so many scenes can be saved in one session.
+
+    :param cmds: The maya.cmds module, or a stand in with the same functions.
+    :param filename: Path of the .ma file to save.
+    :return: Path of the saved file.
+    """
+    cmds.file(new=True, force=True)
+    cmds.group(em=True, name="empty_group")
+    cmds.file(rename=filename)
+    return cmds.file(save=True, type='mayaAscii')
+
+
+def write_empty_group_scene(filename):
+    """
+    Writes the same scene as save_empty_group_scene straight to the .ma file, without
+    Maya.
+
+    :param filename: Path of the .ma file to write.
+    :return: Path of the written file.
+    """
+    with MayaAsciiScene(filename) as scene:
+        scene.create_group("empty_group")
+    return str(scene.path)
 
-maya.standalone.initialize()
-import maya.cmds
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
@@ -13,14 +57,16 @@ if __name__ == '__main__':
     parser.add_argument("-asset", help="The asset the scene is named after. "
                                        "If none is proved will default to argument "
                                        "variable '$asset'", type=str, default="")
+    parser.add_argument("-backend", help="Save the scene with Maya, or write the .ma "
+                                         "file directly without starting Maya.",
+                        choices=["maya", "ascii"], default="maya")
     args = parser.parse_args()
 
     # Get asset name from env variable if no argument passed
     asset_name = args.asset if args.asset else str(os.getenv('asset'))
 
-    # Create empty group
-    maya.cmds.group(em=True, name="empty_group")
-
-    # Save scene
-    maya.cmds.file(rename=asset_name + ".ma")
-    print(f"Saving to: \'{maya.cmds.file(save=True, type='mayaAscii')}\'")
+    if args.backend == "ascii":
+        saved_path = write_empty_group_scene(asset_name + ".ma")
+    else:
+        saved_path = save_empty_group_scene(start_maya(), asset_name + ".ma")
+    print(f"Saving to: \'{saved_path}\'")
@@ -1,29 +1,35 @@
 """Holds function for incrementing and saving maya file"""
 
+import os
+
 import maya.cmds
 
+from versionIndex import getVersionIndex, releaseVersion, splitVersionName
+
 
 def incrementAndSave():
     """
-    Increments the file version by one and saves.
+    Saves the file as the next free version of its asset, task and artist, so a later
+    version already in the directory is never overwritten. The version is reserved
+    before saving, so jobs versioning up at the same time each get their own version.
     Assumes the following file naming conventions:
         asset.task.artist.version.ext
     """
-    delimiter = "."
-
     # Get file name and split
-    file_name = maya.cmds.file(sceneName=True, shortName=True, query=True)
-    asset, task, artist, version, ext = file_name.split(delimiter)
+    scene_path = maya.cmds.file(sceneName=True, query=True)
+    directory, file_name = os.path.split(scene_path)
+    asset, task, artist, version, ext = splitVersionName(file_name)
 
-    # Increment version number
-    version_num = int(version)
-    version_num += 1
-    version = str(version_num)
+    # Reserve the next free version, padded like the current one
+    updated_path = getVersionIndex(directory).reserveNextVersion(asset, task, artist,
+                                                                 ext, len(version))
 
     # Save with updated file name
-    updated_file_name = delimiter.join([asset, task, artist, version, ext])
-    maya.cmds.file(rename=updated_file_name)
-    print(f"Saving to: \'{maya.cmds.file(save=True, type='mayaAscii')}\'")
+    try:
+        maya.cmds.file(rename=updated_path)
+        print(f"Saving to: \'{maya.cmds.file(save=True, type='mayaAscii')}\'")
+    finally:
+        releaseVersion(updated_path)
 
 
 incrementAndSave()
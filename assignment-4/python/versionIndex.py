@@ -0,0 +1,162 @@
+"""Finds and reserves the next free version of versioned files in a directory"""
+
+import os
+import socket
+
+DELIMITER = "."
+LOCK_EXT = "lock"  # Extension of the lock file that reserves a version
+
+_indexes = {}  # Real path of each directory to its VersionIndex
+
+
+def splitVersionName(file_name):
+    """
+    Splits a file name that follows the naming convention:
+        asset.task.artist.version.ext
+
+    :param file_name: Name of the file, without its directory.
+    :return: Tuple of the asset, task, artist, version string and extension.
+    :raises ValueError: If the name doesn't follow the convention.
+    """
+    parts = file_name.split(DELIMITER)
+    if len(parts) != 5 or not parts[3].isdigit():
+        raise ValueError(f"'{file_name}' isn't named asset.task.artist.version.ext")
+    return tuple(parts)
+
+
+def getLockName(asset, task, artist, version):
+    """
+    Gets the name of the lock file of a version. The version isn't padded and there is
+    no extension, so every file name of the version shares one lock.
+
+    :param version: Version number.
+    :return: Name of the lock file, such as 'dragon.model.mmelk.3.lock'.
+    """
+    return DELIMITER.join([asset, task, artist, str(version), LOCK_EXT])
+
+
+class VersionIndex:
+    """
+    Highest version of each asset, task and artist in a directory. The directory is
+    scanned once, and only scanned again once its modification time changes, so finding
+    the next version doesn't list thousands of files each time.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Directory of the versioned files.
+        """
+        self.directory = directory
+        self.mtime_ns = None  # Modification time of the directory when last scanned
+        self.versions = {}  # (asset, task, artist) to its highest version number
+
+    def refresh(self):
+        """
+        Scans the directory if it changed since the last scan. Lock files count as
+        versions, so reserved versions are skipped.
+        """
+        mtime_ns = os.stat(self.directory).st_mtime_ns
+        if mtime_ns == self.mtime_ns:
+            return
+
+        versions = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    asset, task, artist, version, _ = splitVersionName(entry.name)
+                except ValueError:
+                    continue
+                key = (asset, task, artist)
+                versions[key] = max(versions.get(key, 0), int(version))
+        self.versions = versions
+        self.mtime_ns = mtime_ns
+
+    def getLatestVersion(self, asset, task, artist):
+        """
+        :return: Highest version number of the asset, task and artist, or 0 if there is
+            none.
+        """
+        self.refresh()
+        return self.versions.get((asset, task, artist), 0)
+
+    def getVersionFiles(self, asset, task, artist, version):
+        """
+        Lists the directory for files of a version, whatever their extension or padding.
+        Unlike the index, this is never out of date.
+
+        :param version: Version number.
+        :return: Names of the files of the version, without its lock file.
+        """
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    parts = splitVersionName(entry.name)
+                except ValueError:
+                    continue
+                if parts[:3] == (asset, task, artist) and int(parts[3]) == version and \
+                        parts[4] != LOCK_EXT:
+                    files.append(entry.name)
+        return files
+
+    def reserveNextVersion(self, asset, task, artist, ext, padding=1):
+        """
+        Reserves the next free version by creating its lock file. The lock file is
+        created exclusively, so if another process reserves the same version first,
+        the version after it is tried instead. Once locked, the directory is checked
+        for a file of the version with any extension or padding, in case another job
+        saved it since the index was scanned.
+
+        :param ext: Extension of the file to save.
+        :param padding: Number of digits the version is zero padded to.
+        :return: Path of the file to save. Call releaseVersion with it once saved.
+        """
+        version = self.getLatestVersion(asset, task, artist) + 1
+        while True:
+            lock_path = os.path.join(self.directory,
+                                     getLockName(asset, task, artist, version))
+            file_path = os.path.join(self.directory, DELIMITER.join(
+                [asset, task, artist, str(version).zfill(padding), ext]))
+            try:
+                lock_file = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                version += 1
+                continue
+
+            # Who holds the lock, in case a crashed job leaves it behind
+            os.write(lock_file, f"{socket.gethostname()} {os.getpid()}\n".encode())
+            os.close(lock_file)
+            if not self.getVersionFiles(asset, task, artist, version):
+                break
+            os.remove(lock_path)
+            version += 1
+
+        key = (asset, task, artist)
+        self.versions[key] = max(self.versions.get(key, 0), version)
+        return file_path
+
+
+def getVersionIndex(directory):
+    """
+    :param directory: Directory of the versioned files.
+    :return: The cached VersionIndex of the directory.
+    """
+    real_path = os.path.realpath(directory)
+    if real_path not in _indexes:
+        _indexes[real_path] = VersionIndex(real_path)
+    return _indexes[real_path]
+
+
+def releaseVersion(file_path):
+    """
+    Removes the lock file of a version reserved with reserveNextVersion.
+
+    :param file_path: Path returned by reserveNextVersion.
+    """
+    directory, file_name = os.path.split(file_path)
+    asset, task, artist, version, _ = splitVersionName(file_name)
+    lock_path = os.path.join(directory, getLockName(asset, task, artist, int(version)))
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
@@ -1,42 +1,38 @@
+import sys
+from pathlib import Path
+
+import maya.cmds
 from maya import OpenMayaUI as omui
 from PySide2.QtCore import *
 from PySide2.QtGui import *
 from PySide2.QtWidgets import *
 from shiboken2 import wrapInstance
 
-import math
+# Sphere math and scene building are shared with the other sphere tools
+sys.path.append(str(Path(__file__).resolve().parents[2] / "common" / "python"))
+from maya_scene import MayaScene
+from parametric_sphere import LiveSphere, build_parametric_sphere
+
+PREVIEW_DELAY_MS = 150  # Time sliders must rest before the live preview updates
 
 # Get a reference to the main Maya application window
 mayaMainWindowPtr = omui.MQtUtil.mainWindow()
 mayaMainWindow = wrapInstance(int(mayaMainWindowPtr), QWidget)
 
 
-def create_parametric_sphere(radius, step_size):
+def create_parametric_sphere(radius, step_size, scene=None):
     """
     Generates a parametric sphere out of default cubes. Centered at the origin.
-    Parametric sphere equation: https://external-content.duckduckgo.com/iu/?u=http%3A%2F%2Fwww.songho.ca%2Fopengl%2Ffiles%2Fgl_sphere01.png&f=1&nofb=1&ipt=9cbb49b70493462ee88c03662117bd09799c84ccdae76ded3fe82271a91ec09d&ipo=images
+    See parametric_sphere.build_parametric_sphere.
 
     :param radius: Radius of the generated sphere.
     :param step_size: Size of each step around sphere in degrees. A higher value yields
         a lower resolution.
+    :param scene: Scene to build in. Defaults to the open Maya scene.
+    :return: Tuple of the group and the list of cube transforms
     """
     print("Creating a parametric sphere...")
-
-    # Loop through positions on a sphere
-    # Phi is latitude, theta is longitude
-    for phi in range(-90, 91, step_size):
-        for theta in range(0, 360, step_size):
-            # Convert phi and theta to radians
-            t, p = math.radians(theta), math.radians(phi)
-
-            # Calculate position
-            pos = radius * math.cos(p) * math.cos(t), \
-                  radius * math.sin(p), \
-                  radius * math.cos(p) * math.sin(t)
-
-            # Generate and move cube
-            maya.cmds.polyCube()
-            maya.cmds.move(*pos)
+    return build_parametric_sphere(radius, step_size, scene or MayaScene())
 
 
 class MyMayaWidget(QWidget):
@@ -59,6 +55,19 @@ class MyMayaWidget(QWidget):
         self.generate_button.setGeometry(QRect(230, 70, 75, 23))
         self.generate_button.clicked.connect(self.generate_onClicked)
 
+        # Create live preview checkbox
+        self.live_checkbox = QCheckBox("Live preview", self)
+        self.live_checkbox.setGeometry(QRect(10, 70, 100, 23))
+        self.live_checkbox.toggled.connect(self.live_onToggled)
+
+        # Sphere the sliders update while live preview is on. Slider changes restart the
+        # timer, so the sphere is only updated once the sliders rest.
+        self.preview = LiveSphere(MayaScene())
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+
         # Create radius text label
         self.radius_label = QLabel(self)
         self.radius_label.setGeometry(QRect(10, 10, 47, 13))
@@ -102,19 +111,57 @@ class MyMayaWidget(QWidget):
         Updates the value of radius value label on slider change
         """
         self.radius_val.setText(str(self.radius_slider.value()))
+        self.queue_preview()
 
     def update_step(self):
         """
         Updates the value of step size value label on slider change
         """
         self.step_val.setText(str(self.step_slider.value()))
+        self.queue_preview()
+
+    def queue_preview(self):
+        """
+        Updates the live preview once the sliders rest, if live preview is on
+        """
+        if self.live_checkbox.isChecked():
+            self.preview_timer.start()
+
+    def update_preview(self):
+        """
+        Updates the preview sphere in place with the slider values. Builds it again if
+        it was deleted from the scene.
+        """
+        if self.preview.group is not None and not maya.cmds.objExists(self.preview.group):
+            self.preview = LiveSphere(MayaScene())
+        self.preview.update(self.radius_slider.value(), self.step_slider.value())
+
+    def live_onToggled(self, checked):
+        """
+        Shows the preview sphere when live preview is turned on, and deletes it when
+        turned off
+        """
+        self.preview_timer.stop()
+        if checked:
+            self.update_preview()
+        elif self.preview.group is not None and maya.cmds.objExists(self.preview.group):
+            self.preview.delete()
+        else:
+            self.preview = LiveSphere(MayaScene())
 
     def generate_onClicked(self):
         """
-        Generates a parametric sphere using the given radius value
+        Generates a parametric sphere using the given radius value. With live preview
+        on, the preview sphere is kept as the result, and the next preview starts a new
+        sphere.
         """
         print("Generate clicked!")
-        create_parametric_sphere(self.radius_slider.value(), self.step_slider.value())
+        if self.live_checkbox.isChecked():
+            self.preview_timer.stop()
+            self.update_preview()
+            self.preview = LiveSphere(MayaScene())
+        else:
+            create_parametric_sphere(self.radius_slider.value(), self.step_slider.value())
 
 
 my_widget = MyMayaWidget()
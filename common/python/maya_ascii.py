@@ -0,0 +1,210 @@
+"""Writes Maya ASCII (.ma) scenes directly, without starting maya.standalone"""
+
+from pathlib import Path
+
+import numpy as np
+
+MAYA_VERSION = "2022"  # Maya version the scenes are written for
+
+
+def quote(text):
+    """
+    :param text: Text to write as a MEL string.
+    :return: Text in double quotes, with quotes and backslashes escaped.
+    """
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class MayaAsciiWriter:
+    """
+    Streams MEL statements of a .ma file to disk as nodes are created. Use as a context
+    manager, or call close when done.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: Path of the .ma file to write.
+        """
+        self.path = Path(filename).resolve()
+        self.file = open(self.path, "w", encoding="utf-8", newline="\n")
+        self.write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write_header(self):
+        """
+        Writes the same header Maya does.
+        """
+        self.file.write(f"//Maya ASCII {MAYA_VERSION} scene\n"
+                        f"//Name: {self.path.name}\n"
+                        f"requires maya {quote(MAYA_VERSION)};\n"
+                        "currentUnit -l centimeter -a degree -t film;\n"
+                        'fileInfo "application" "maya";\n')
+
+    def create_node(self, node_type, name, parent=None, attrs=()):
+        """
+        Writes a createNode statement and the attributes set on the new node.
+
+        :param node_type: Type of the node, such as 'transform'.
+        :param name: Name of the node.
+        :param parent: Full path of the parent of the node, if any.
+        :param attrs: setAttr arguments of each attribute to set, after the node name.
+            Ex: '".t" -type "double3" 0 1 0'
+        """
+        parent_flag = f" -p {quote(parent)}" if parent else ""
+        self.file.write(f"createNode {node_type} -n {quote(name)}{parent_flag};\n")
+        self.file.writelines(f"\tsetAttr {attr};\n" for attr in attrs)
+
+    def set_attrs(self, node, attrs):
+        """
+        Writes setAttr statements on a node created earlier.
+
+        :param node: Full path of the node.
+        :param attrs: setAttr arguments of each attribute to set. See create_node.
+        """
+        self.file.write(f"select -ne {quote(node)};\n")
+        self.file.writelines(f"\tsetAttr {attr};\n" for attr in attrs)
+
+    def connect_attr(self, source, destination, next_available=False):
+        """
+        :param source: Source attribute, such as 'polyCube1.out'.
+        :param destination: Destination attribute.
+        :param next_available: Connect to the next free element of a multi attribute.
+        """
+        flag = " -na" if next_available else ""
+        self.file.write(f"connectAttr {quote(source)} {quote(destination)}{flag};\n")
+
+    def add_instance(self, shape, parent):
+        """
+        Writes an instance of a shape under another transform, the same as Maya saves
+        instances.
+
+        :param shape: Full path of the shape.
+        :param parent: Full path of the transform to add the instance under.
+        """
+        self.file.write(f"parent -s -nc -r -add {quote(shape)} {quote(parent)};\n")
+
+    def close(self):
+        """
+        Writes the end of the file and closes it.
+        """
+        if not self.file.closed:
+            self.file.write(f"// End of {self.path.name}\n")
+            self.file.close()
+
+
+class MayaAsciiScene:
+    """
+    Scene that is written straight to a .ma file instead of built in Maya. Each method
+    streams the statements Maya would save for the same nodes, so writing a scene takes
+    milliseconds rather than the seconds maya.standalone takes to start. The scene is
+    write-only: it has the methods of parametric_sphere.StubScene that create and move
+    nodes, but no delete, as nodes already on disk can't be taken back. It can be built
+    in with build_parametric_sphere, but not updated with parametric_sphere.LiveSphere.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: Path of the .ma file to write.
+        """
+        self.writer = MayaAsciiWriter(filename)
+        self.path = self.writer.path
+        self.names = set()
+        self.shapes = {}  # Full path of each cube's transform to its shape
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """
+        Finishes the .ma file.
+        """
+        self.writer.close()
+
+    def get_unique_name(self, name):
+        """
+        :param name: Name of a new node.
+        :return: The name, with its trailing number raised if it is taken, the same as
+            Maya does.
+        """
+        base_name = name.rstrip("0123456789")
+        unique_name, i = name, 1
+        while unique_name in self.names:
+            unique_name, i = f"{base_name}{i}", i + 1
+        self.names.add(unique_name)
+        return unique_name
+
+    def create_group(self, name, parent=None):
+        """
+        :param name: Name of the group.
+        :param parent: Full path of the group to create the group under, if any.
+        :return: Full path of the empty group created.
+        """
+        name = self.get_unique_name(name)
+        self.writer.create_node("transform", name, parent)
+        return f"{parent or ''}|{name}"
+
+    def create_cube(self, name, parent=None):
+        """
+        Writes a default polyCube, with its construction history.
+
+        :param name: Name of the cube's transform.
+        :param parent: Full path of the group to create the cube under, if any.
+        :return: Full path of the cube's transform.
+        """
+        transform = self.create_group(name, parent)
+        shape_name = self.get_unique_name(f"{transform.split('|')[-1]}Shape")
+        shape = f"{transform}|{shape_name}"
+        self.writer.create_node("mesh", shape_name, transform, [
+            '-k off ".v"',
+            '".vir" yes',
+            '".vif" yes',
+            '".uvst[0].uvsn" -type "string" "map1"',
+            '".cuvs" -type "string" "map1"',
+            '".dcc" -type "string" "Ambient+Diffuse"',
+            '".covm[0]"  0 1 1',
+            '".cdvm[0]"  0 1 1'
+        ])
+        creator = self.get_unique_name("polyCube1")
+        self.writer.create_node("polyCube", creator, attrs=['".cuv" 4'])
+        self.writer.connect_attr(f"{creator}.out", f"{shape}.i")
+        self.writer.connect_attr(f"{shape}.iog", ":initialShadingGroup.dsm", True)
+        self.shapes[transform] = shape
+        return transform
+
+    def create_instances(self, source, count, parent=None, first_index=1):
+        """
+        :param source: Full path of the transform of the cube to instance.
+        :param count: Number of instances.
+        :param parent: Full path of the group to create the instances under, if any.
+        :param first_index: Number added to the name of the first instance.
+        :return: List of the full paths of the transforms of the instances.
+        """
+        shape = self.shapes[source]
+        shape_name = shape.split("|")[-1]
+        base_name = source.split("|")[-1]
+        transforms = []
+        for i in range(first_index, first_index + count):
+            transform = self.create_group(f"{base_name}{i}", parent)
+            self.writer.add_instance(shape, transform)
+            self.writer.connect_attr(f"{transform}|{shape_name}.iog",
+                                     ":initialShadingGroup.dsm", True)
+            transforms.append(transform)
+        return transforms
+
+    def set_positions(self, transforms, positions):
+        """
+        :param transforms: Full paths of the transforms to move.
+        :param positions: Array of shape (transforms, 3) of the position of each.
+        """
+        for transform, position in zip(transforms, np.asarray(positions).tolist()):
+            self.writer.set_attrs(transform, [
+                '".t" -type "double3" ' + " ".join(map(repr, position))
+            ])
@@ -0,0 +1,94 @@
+"""Maya scene that parametric_sphere.py builds in, with batched node creation and moves"""
+
+import maya.cmds
+from maya.api import OpenMaya
+
+
+def get_objects(names):
+    """
+    Looks up many nodes in one selection list.
+
+    :param names: Names of the nodes.
+    :return: List of the MObject of each node.
+    """
+    selection = OpenMaya.MSelectionList()
+    for name in names:
+        selection.add(name)
+    return [selection.getDependNode(i) for i in range(len(names))]
+
+
+class MayaScene:
+    """
+    Builds in the open Maya scene. Nodes are created and moved with an API modifier, so
+    thousands of cubes are a single operation rather than a command per cube. Has the
+    same methods as parametric_sphere.StubScene.
+    """
+
+    def create_group(self, name):
+        """
+        :param name: Name of the group.
+        :return: Name of the empty group created.
+        """
+        return maya.cmds.group(empty=True, name=name)
+
+    def create_cube(self, name, parent=None):
+        """
+        :param name: Name of the cube's transform.
+        :param parent: Group to create the cube under, if any.
+        :return: Full path of the default cube's transform.
+        """
+        transform = maya.cmds.polyCube(name=name)[0]
+        if parent:
+            transform = maya.cmds.parent(transform, parent)[0]
+        return maya.cmds.ls(transform, long=True)[0]
+
+    def create_instances(self, source, count, parent=None, first_index=1):
+        """
+        Creates every transform in one modifier, then adds the source's shape under each
+        one as an instance.
+
+        :param source: Transform of the cube to instance.
+        :param count: Number of instances.
+        :param parent: Group to create the instances under, if any.
+        :param first_index: Number added to the name of the first instance.
+        :return: List of the full paths of the transforms of the instances.
+        """
+        shape = maya.cmds.listRelatives(source, shapes=True, fullPath=True)[0]
+        shape_obj = get_objects([shape])[0]
+        parent_obj = get_objects([parent])[0] if parent else OpenMaya.MObject.kNullObj
+        base_name = source.split("|")[-1]
+
+        modifier = OpenMaya.MDagModifier()
+        transforms = []
+        for i in range(first_index, first_index + count):
+            transform = modifier.createNode("transform", parent_obj)
+            modifier.renameNode(transform, f"{base_name}{i}")
+            transforms.append(transform)
+        modifier.doIt()
+
+        for transform in transforms:
+            OpenMaya.MFnDagNode(transform).addChild(shape_obj, OpenMaya.MFnDagNode.kNextPos,
+                                                    True)
+        return [OpenMaya.MDagPath.getAPathTo(transform).fullPathName()
+                for transform in transforms]
+
+    def set_positions(self, transforms, positions):
+        """
+        Moves every transform in one modifier.
+
+        :param transforms: Transforms to move.
+        :param positions: Array of shape (transforms, 3) of the position of each.
+        """
+        modifier = OpenMaya.MDGModifier()
+        for obj, position in zip(get_objects(transforms), positions.tolist()):
+            node = OpenMaya.MFnDependencyNode(obj)
+            for axis, value in zip("XYZ", position):
+                modifier.newPlugValueDouble(node.findPlug(f"translate{axis}", False), value)
+        modifier.doIt()
+
+    def delete(self, nodes):
+        """
+        :param nodes: Nodes to delete, along with their children.
+        """
+        if nodes:
+            maya.cmds.delete(nodes)
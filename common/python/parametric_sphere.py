@@ -0,0 +1,224 @@
+"""Maya-free math and scene building of parametric spheres made out of cubes"""
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+
+def get_sphere_directions(step_size):
+    """
+    Gets the unit direction of each point of a parametric sphere, for every latitude and
+    longitude step at once. Each pole is a single point, rather than a ring of points at
+    the same position.
+    Parametric sphere equation: http://www.songho.ca/opengl/gl_sphere.html
+
+    :param step_size: Size of each step around sphere in degrees. A higher value yields
+        a lower resolution.
+    :return: Array of shape (points, 3) of x, y, z directions. Ordered from the south
+        pole up, one ring of latitude at a time.
+    """
+    # Phi is latitude, theta is longitude
+    phi = np.arange(-90, 91, step_size)
+    theta = np.radians(np.arange(0, 360, step_size))
+    is_pole = np.abs(phi) == 90
+    rings = np.radians(phi[~is_pole])[:, np.newaxis]
+
+    ring_directions = np.stack([np.cos(rings) * np.cos(theta),
+                                np.broadcast_to(np.sin(rings), (len(rings), len(theta))),
+                                np.cos(rings) * np.sin(theta)], axis=-1).reshape(-1, 3)
+    south_pole = [[0.0, -1.0, 0.0]] if phi[0] == -90 else []
+    north_pole = [[0.0, 1.0, 0.0]] if phi[-1] == 90 else []
+    return np.concatenate([np.reshape(south_pole, (-1, 3)), ring_directions,
+                           np.reshape(north_pole, (-1, 3))])
+
+
+def get_sphere_points(radius, step_size):
+    """
+    Gets the position of each point of a parametric sphere centered at the origin.
+
+    :param radius: Radius of the sphere.
+    :param step_size: Size of each step around sphere in degrees. See
+        get_sphere_directions.
+    :return: Array of shape (points, 3) of x, y, z positions
+    """
+    return radius * get_sphere_directions(step_size)
+
+
+def build_parametric_sphere(radius, step_size, scene, name="parametric_sphere"):
+    """
+    Builds a parametric sphere out of cubes under a group, in a few batched calls rather
+    than a few calls per cube. The first cube is the source cube and every other cube is
+    an instance of it.
+
+    :param radius: Radius of the sphere.
+    :param step_size: Size of each step around sphere in degrees.
+    :param scene: Scene to build in, such as maya_scene.MayaScene or StubScene.
+    :param name: Name of the group of cubes.
+    :return: Tuple of the group and the list of cube transforms, in
+        get_sphere_directions order
+    """
+    points = get_sphere_points(radius, step_size)
+    group = scene.create_group(name)
+    source = scene.create_cube(f"{name}_cube", group)
+    cubes = [source] + scene.create_instances(source, len(points) - 1, group)
+    scene.set_positions(cubes, points)
+    return group, cubes
+
+
+class LiveSphere:
+    """
+    Parametric sphere that is built once, then updated in place for each new radius and
+    step size rather than built again. The cube at each index of cubes is named after
+    its index, the same as build_parametric_sphere names them.
+    """
+
+    def __init__(self, scene, name="parametric_sphere"):
+        """
+        :param scene: Scene to build in, such as maya_scene.MayaScene or StubScene. Must
+            be able to delete nodes, so a write-only maya_ascii.MayaAsciiScene can't be
+            used.
+        :param name: Name of the group of cubes.
+        """
+        self.scene = scene
+        self.name = name
+        self.group = None  # Group of the cubes, once built
+        self.cubes = []  # Cube transforms, in get_sphere_directions order
+
+    def update(self, radius, step_size):
+        """
+        Builds the sphere, or moves the cubes of the built sphere. A new radius is a
+        single move of every cube. A new step size also creates or deletes only the
+        cubes the number of points changed by.
+
+        :param radius: Radius of the sphere.
+        :param step_size: Size of each step around sphere in degrees.
+        :return: Tuple of the group and the list of cube transforms
+        """
+        if self.group is None:
+            self.group, self.cubes = build_parametric_sphere(radius, step_size,
+                                                             self.scene, self.name)
+            return self.group, self.cubes
+
+        points = get_sphere_points(radius, step_size)
+        if len(points) > len(self.cubes):
+            self.cubes += self.scene.create_instances(self.cubes[0],
+                                                      len(points) - len(self.cubes),
+                                                      self.group, len(self.cubes))
+        elif len(points) < len(self.cubes):
+            self.scene.delete(self.cubes[len(points):])
+            del self.cubes[len(points):]
+        self.scene.set_positions(self.cubes, points)
+        return self.group, self.cubes
+
+    def delete(self):
+        """
+        Deletes the sphere, if it was built.
+        """
+        if self.group is not None:
+            self.scene.delete([self.group])
+        self.group, self.cubes = None, []
+
+
+class StubScene:
+    """
+    Stand in for a Maya scene that only records the nodes it is asked to create, so
+    spheres can be tested and benchmarked without Maya. Scenes have the same methods
+    as this class.
+    """
+
+    def __init__(self):
+        self.nodes = {}  # Name of each node to its type and parent
+        self.positions = {}  # Name of each transform to its position
+        self.calls = Counter()  # Number of calls of each method, one round trip each
+
+    def add_node(self, name, node_type, parent=None):
+        """
+        Records a node, renamed with a number if the name is taken.
+
+        :param name: Name of the node.
+        :param node_type: Type of the node, such as 'transform'.
+        :param parent: Parent of the node, if any.
+        :return: Name of the node.
+        """
+        unique_name, i = name, 1
+        while unique_name in self.nodes:
+            unique_name, i = f"{name}{i}", i + 1
+        self.nodes[unique_name] = {"type": node_type, "parent": parent}
+        return unique_name
+
+    def create_group(self, name):
+        """
+        :param name: Name of the group.
+        :return: Name of the empty group created.
+        """
+        self.calls["create_group"] += 1
+        return self.add_node(name, "transform")
+
+    def create_cube(self, name, parent=None):
+        """
+        :param name: Name of the cube's transform.
+        :param parent: Group to create the cube under, if any.
+        :return: Name of the default cube's transform.
+        """
+        self.calls["create_cube"] += 1
+        transform = self.add_node(name, "transform", parent)
+        self.add_node(f"{transform}Shape", "mesh", transform)
+        return transform
+
+    def create_instances(self, source, count, parent=None, first_index=1):
+        """
+        :param source: Transform of the cube to instance.
+        :param count: Number of instances.
+        :param parent: Group to create the instances under, if any.
+        :param first_index: Number added to the name of the first instance.
+        :return: List of the transforms of the instances.
+        """
+        self.calls["create_instances"] += 1
+        return [self.add_node(f"{source}{i}", "transform", parent)
+                for i in range(first_index, first_index + count)]
+
+    def set_positions(self, transforms, positions):
+        """
+        :param transforms: Transforms to move.
+        :param positions: Array of shape (transforms, 3) of the position of each.
+        """
+        self.calls["set_positions"] += 1
+        self.positions.update(zip(transforms, np.asarray(positions).tolist()))
+
+    def delete(self, nodes):
+        """
+        :param nodes: Nodes to delete, along with their children.
+        """
+        self.calls["delete"] += 1
+        deleted = set(nodes)
+        while True:
+            children = {name for name, info in self.nodes.items()
+                        if info["parent"] in deleted} - deleted
+            if not children:
+                break
+            deleted |= children
+        for node in deleted:
+            self.nodes.pop(node, None)
+            self.positions.pop(node, None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This script benchmarks building a parametric sphere without Maya.")
+    parser.add_argument("-radius", help="Radius of the sphere.", type=float, default=5)
+    parser.add_argument("-step_size",
+                        help="Size of each step around sphere in degrees. "
+                             "A higher value yields a lower resolution.",
+                        type=int, default=2)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stub_scene = StubScene()
+    _, sphere_cubes = build_parametric_sphere(args.radius, args.step_size, stub_scene)
+    seconds = time.perf_counter() - start
+
+    print(f"Cubes: {len(sphere_cubes)}")
+    print(f"Scene calls: {sum(stub_scene.calls.values())}")
+    print(f"Seconds: {seconds:.4f}")
@@ -0,0 +1,288 @@
+"""
+Benchmarks each stage of brokenFrames.py on a frame sequence, and compares results with
+a saved baseline to catch performance regressions.
+"""
+import argparse
+import io
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from multiprocessing import get_context
+from pathlib import Path
+
+import cv2
+
+from brokenFrames import (DEFAULT_METRIC_OPTIONS, NAMING_CONVENTION_TXT, THUMBNAIL_WIDTH,
+                          check_images_metadata, create_thumbnail, get_average_value,
+                          get_filter_ranges, get_images_info, get_region_values,
+                          get_value_plane, load_naming_convention, print_image_report,
+                          read_image)
+from contactSheet import ContactSheetWriter
+from frameChecks import CHECKS, FrameTable, run_checks
+from frameIndex import FrameIndex
+from generateFrames import generate_sequence
+
+STAGES = ["listing", "small_check", "structure_check", "mismatch_check", "decode",
+          "dark_check", "region_check", "report", "grid", "end_to_end"]
+DEFAULT_TOLERANCE = 0.1  # Fraction a result can get worse by before it is a regression
+
+
+def get_peak_rss_mb() -> float:
+    """
+    :return: Peak resident memory of this process in megabytes
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak_rss / (1048576 if sys.platform == "darwin" else 1024)
+
+
+def run_stage(stage: str, frames_dir: str, naming_txt_path: str) -> dict:
+    """
+    Runs and times one stage over every frame in frames_dir. Work the stage depends on,
+    such as decoding frames for the dark check, is not timed.
+    Meant to run in a fresh process, so peak memory only counts this stage.
+
+    :param stage: Stage to run, one of STAGES
+    :param frames_dir: Directory of frames
+    :param naming_txt_path: Path to the naming convention .txt file
+    :return: Dictionary of "seconds" spent in the stage, "frames" processed and
+        "peak_rss_mb" of the process
+    """
+    name_words, ext = load_naming_convention(naming_txt_path)
+    name_filter = get_filter_ranges({word: None for word in name_words})
+    frame_index = FrameIndex.from_directory(frames_dir, name_words, ext)
+    image_files = frame_index.files(frame_index.filter(name_filter))
+
+    seconds = 0.0
+    if stage == "listing":
+        start = time.perf_counter()
+        frame_index = FrameIndex.from_directory(frames_dir, name_words, ext)
+        frame_index.files(frame_index.filter(name_filter))
+        seconds = time.perf_counter() - start
+
+    elif stage == "structure_check":
+        # Reading the table is the file size and PNG structure of every frame
+        start = time.perf_counter()
+        FrameTable.from_files(image_files)
+        seconds = time.perf_counter() - start
+
+    elif stage in ("small_check", "mismatch_check"):
+        table = FrameTable.from_files(image_files)
+        start = time.perf_counter()
+        params = {"size_thresh": .2, "sequence_dims": table.get_sequence_dimensions()}
+        run_checks(table, [CHECKS["small" if stage == "small_check" else "mismatch"]],
+                   params)
+        seconds = time.perf_counter() - start
+
+    elif stage == "report":
+        images_info = check_images_metadata(image_files, .2)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for file_name, im_info in images_info.items():
+                print_image_report(file_name, im_info)
+        seconds = time.perf_counter() - start
+
+    elif stage in ("decode", "dark_check", "region_check", "grid"):
+        with tempfile.TemporaryDirectory() as grid_dir:
+            grid_writer = ContactSheetWriter(str(Path(grid_dir) / "grid.jpg"))
+            for file in image_files:
+                start = time.perf_counter()
+                image = read_image(file)
+                if stage == "decode":
+                    seconds += time.perf_counter() - start
+                if image is None:
+                    continue
+
+                start = time.perf_counter()
+                if stage == "dark_check":
+                    table = FrameTable([file.name])
+                    table.value[0] = get_average_value(image)
+                    run_checks(table, [CHECKS["dark"]], {"value_thresh": .01})
+                elif stage == "region_check":
+                    # The value plane is shared with the dark check, so it isn't timed
+                    plane = get_value_plane(image)
+                    table = FrameTable([file.name])
+                    table.value[0] = cv2.mean(plane)[0] / 255
+                    start = time.perf_counter()
+                    table.set_regions(0, get_region_values(
+                        plane, DEFAULT_METRIC_OPTIONS["region_grid"]))
+                    run_checks(table, [CHECKS["region"]], {
+                        "value_thresh": .01,
+                        "region_thresh": DEFAULT_METRIC_OPTIONS["region_thresh"],
+                        "region_diff": DEFAULT_METRIC_OPTIONS["region_diff"]})
+                elif stage == "grid":
+                    grid_writer.add(create_thumbnail(image, THUMBNAIL_WIDTH))
+                if stage != "decode":
+                    seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            grid_writer.close()
+            if stage == "grid":
+                seconds += time.perf_counter() - start
+
+    elif stage == "end_to_end":
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as grid_dir, redirect_stdout(io.StringIO()):
+            frame_index = FrameIndex.from_directory(frames_dir, name_words, ext)
+            with ContactSheetWriter(str(Path(grid_dir) / "grid.jpg")) as grid_writer:
+                for file_name, im_info in get_images_info(
+                        frame_index.files(frame_index.filter(name_filter)), .01, .2):
+                    print_image_report(file_name, im_info)
+                    if im_info["warnings"] and im_info["image"] is not None:
+                        grid_writer.add(im_info["image"])
+        seconds = time.perf_counter() - start
+
+    else:
+        raise ValueError(f"Invalid stage: {stage}")
+
+    return {
+        "seconds": seconds,
+        "frames": len(image_files),
+        "peak_rss_mb": get_peak_rss_mb()
+    }
+
+
+def run_benchmarks(frames_dir: str, stages: list, repeat: int = 3,
+                   naming_txt_path: str = NAMING_CONVENTION_TXT) -> dict:
+    """
+    Runs each stage in its own fresh process, keeping the fastest of each repeat.
+
+    :param frames_dir: Directory of frames
+    :param stages: Stages to run
+    :param repeat: Number of times to run each stage
+    :param naming_txt_path: Path to the naming convention .txt file
+    :return: Dictionary of stage to its results. See run_stage. Also has "fps", frames
+        per second.
+    """
+    results = {}
+    for stage in stages:
+        runs = []
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) \
+                    as executor:
+                runs.append(executor.submit(run_stage, stage, frames_dir,
+                                            naming_txt_path).result())
+        best = min(runs, key=lambda run: run["seconds"])
+        best["peak_rss_mb"] = max(run["peak_rss_mb"] for run in runs)
+        best["fps"] = best["frames"] / best["seconds"] if best["seconds"] else float("inf")
+        results[stage] = best
+    return results
+
+
+def find_regressions(results: dict, baseline: dict,
+                     tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compares results with a baseline.
+
+    :param results: Results of run_benchmarks
+    :param baseline: Results of an earlier run_benchmarks
+    :param tolerance: Fraction a stage can get slower, or use more memory, before it is
+        a regression
+    :return: List of descriptions of each regression
+    """
+    regressions = []
+    for stage, result in results.items():
+        if stage not in baseline:
+            continue
+        base = baseline[stage]
+        if result["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{stage} - {result['fps']:.1f} frames/sec, "
+                               f"baseline is {base['fps']:.1f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{stage} - Peak memory {result['peak_rss_mb']:.1f} MB, "
+                               f"baseline is {base['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    """
+    Outputs results of each stage to command line.
+
+    :param results: Results of run_benchmarks
+    :param baseline: Results of an earlier run_benchmarks to show changes against
+    """
+    print(f"{'Stage':<16}{'Frames/sec':>12}{'Seconds':>10}{'Peak MB':>10}{'Change':>10}")
+    for stage, result in results.items():
+        change = ""
+        if baseline and stage in baseline and baseline[stage]["fps"]:
+            change = f"{result['fps'] / baseline[stage]['fps'] - 1:+.1%}"
+        print(f"{stage:<16}{result['fps']:>12.1f}{result['seconds']:>10.3f}"
+              f"{result['peak_rss_mb']:>10.1f}{change:>10}")
+
+
+def main():
+    """
+    Generates frames if needed, benchmarks them, then compares with the baseline
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        frames_dir = args.frames_dir
+        if not frames_dir:
+            frames_dir = temp_dir
+            generate_sequence(frames_dir, args.count, args.width, args.height,
+                              args.bit_depth, seed=args.seed, naming_txt_path=args.naming)
+        results = run_benchmarks(frames_dir, args.stages, args.repeat, args.naming)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["stages"]
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({
+                "params": {k: v for k, v in vars(args).items()
+                           if k not in ("save", "baseline")},
+                "platform": platform.platform(),
+                "stages": results
+            }, file, indent=4)
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This tool benchmarks each stage of brokenFrames.py. Without "
+                    "frames_dir a synthetic sequence is generated. Save results with "
+                    "'--save' and compare later runs with '--baseline'.")
+    parser.add_argument("frames_dir", help="Directory of frames. Default is a generated "
+                                           "sequence", type=str, nargs="?")
+    parser.add_argument("--count", help="Number of frames to generate. Default is '100'",
+                        type=int, default=100)
+    parser.add_argument("--width", help="Width of generated frames. Default is '1920'",
+                        type=int, default=1920)
+    parser.add_argument("--height", help="Height of generated frames. Default is '1080'",
+                        type=int, default=1080)
+    parser.add_argument("--bit_depth", help="Bits per channel of generated frames. "
+                                            "Default is '8'",
+                        type=int, choices=[8, 16], default=8)
+    parser.add_argument("--seed", help="Random seed of generated frames. Default is '0'",
+                        type=int, default=0)
+    parser.add_argument("--naming", help="Path to the naming convention .txt file. "
+                                         f"Default is '{NAMING_CONVENTION_TXT}'",
+                        type=str, default=NAMING_CONVENTION_TXT)
+    parser.add_argument("--stages", help="Stages to benchmark. Default is all",
+                        choices=STAGES, nargs="+", default=STAGES)
+    parser.add_argument("--repeat", help="Number of runs of each stage. The fastest is "
+                                         "kept. Default is '3'",
+                        type=int, default=3)
+    parser.add_argument("--save", help="Save results to a .json file", type=str)
+    parser.add_argument("--baseline", help="Compare results with a .json file saved with "
+                                           "'--save'. Exits with an error on regressions",
+                        type=str)
+    parser.add_argument("--tolerance", help="Fraction a stage can get slower, or use more "
+                                            "memory, before it is a regression. Default "
+                                            f"is '{DEFAULT_TOLERANCE}'",
+                        type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    main()
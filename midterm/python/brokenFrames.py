@@ -2,14 +2,56 @@
 Broken Frames Analyzer
 """
 import argparse
+import base64
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from itertools import repeat
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 import cv2
 import numpy as np
 
+from contactSheet import DEFAULT_PAGE_SIZE, ContactSheetWriter
+from frameCache import DEFAULT_CACHE_MAX_MB, FrameCache
+from frameChecks import (BYTES_IN_MEGABYTE, CHECKS, FrameTable, get_bad_region_boxes,
+                         get_checks, run_checks)
+from frameIndex import FrameIndex, find_frame_directories, format_ranges, get_shard
+from frameMetrics import Metrics
+from framePrefetch import DEFAULT_PREFETCH_DEPTH, DEFAULT_PREFETCH_MB, prefetch_files
+from frameSampling import DEFAULT_SAMPLE_STEP, SequenceSampler
+from frameSignatures import (SEQUENCE_CHECKS, SIGNATURE_CHECKS, SIGNATURE_DTYPE,
+                             find_sequence_anomalies, get_frame_signature, to_signature_row)
+from frameWatcher import FrameWatcher
+
 NAMING_CONVENTION_TXT = "./naming.txt"
-BYTES_IN_MEGABYTE = 1048576
+ANALYZER_VERSION = 4  # Bump when analysis results change, to invalidate cached results
+THUMBNAIL_WIDTH = 100  # Width of each thumbnail in the warning image grid
+GRID_WIDTH = 4  # Number of thumbnails per row in the warning image grid
+PARALLEL_CHUNK_SIZE = 4  # Number of frames sent to a worker process at a time
+VALUE_METRICS = ["hsv", "max", "luma"]
+REPORT_FORMATS = ["text", "jsonl"]
+# Image read flags for decoding at 1/n resolution
+DECODE_SCALES = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+DEFAULT_METRIC_OPTIONS = {
+    "metric": "hsv",
+    "decode_scale": 1,
+    "pixel_step": 1,
+    "compare": False,
+    "region_grid": (4, 4),
+    "region_thresh": 0.01,
+    "region_diff": 0.1
+}
 
 
 def load_naming_convention(naming_txt_path: str) -> (List[str], str):
@@ -63,229 +105,1200 @@ def get_filter_ranges(raw_filter: dict) -> dict:
     return clean_filter
 
 
-def get_images_info(directory: str, name_filter: dict, ext_filter: str) -> dict:
+def read_image(file: Path, decode_scale: int = 1,
+               data: Optional[bytes] = None) -> Optional[np.ndarray]:
+    """
+    Decodes an image.
+
+    :param file: Image file to read
+    :param decode_scale: Decode the image at 1/decode_scale resolution, one of
+        DECODE_SCALES. Reduced images blend neighbouring pixels together, so their
+        average value can differ slightly from the exact value.
+    :param data: Contents of the file, if already read. See prefetch_files.
+    :return: Numpy image array, or None if the image could not be decoded
+    """
+    if data is not None:
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), DECODE_SCALES[decode_scale])
+    return cv2.imread(str(file), DECODE_SCALES[decode_scale])
+
+
+def check_images_metadata(files: List[Path], size_threshold_mb: float,
+                          verify_crc: bool = False, checks: Optional[Iterable[str]] = None,
+                          sequence_dims: Optional[Tuple[int, int]] = None) -> dict:
     """
-    Filters out desired images in directory and returns dictionary of image info.
-    Output dictionary format:
-    "<image name>" : {
-        "image": numpy image array
-        "size": size of image in megabytes
-        "warnings": empty list to add warnings to
+    Runs only the checks that don't need the image pixels, such as file size, file
+    structure and dimensions, over every image at once. The images are not decoded.
+
+    :param files: Image files to check
+    :param size_threshold_mb: Threshold for image size in megabytes. Images at or below
+        this size are given a warning.
+    :param verify_crc: Also verify the CRC of every PNG chunk. See FrameTable.from_files.
+    :param checks: Names of the checks that are turned on. Default is all.
+    :param sequence_dims: Width and height the images should have. Default is the most
+        common dimensions of the images.
+    :return: Dictionary of image name to its image info. See FrameTable.get_image_info.
+    """
+    table = FrameTable.from_files(files, verify_crc)
+    params = {
+        "size_thresh": size_threshold_mb,
+        "sequence_dims": sequence_dims or table.get_sequence_dimensions()
     }
+    run_checks(table, get_checks("metadata", checks), params)
+    return {name: table.get_image_info(i, params) for i, name in enumerate(table.names)}
 
-    :param directory:
-    :param name_filter: Dictionary containing number range for each name word
-    :param ext_filter: File extension of images
-    :return: Dictionary containing information of each image.
+
+def check_image_metadata(file: Path, size_threshold_mb: float, verify_crc: bool = False,
+                         checks: Optional[Iterable[str]] = None) -> dict:
     """
-    # Gather all images in directory
-    images_info = {}
+    Runs the metadata checks on a single image. See check_images_metadata.
 
-    for file in Path(directory).iterdir():
-        # Skip over directories
-        if not file.is_file():
-            continue
+    :param file: Image file to check
+    :param size_threshold_mb: Threshold for image size in megabytes
+    :param verify_crc: Also verify the CRC of every PNG chunk
+    :param checks: Names of the checks that are turned on. Default is all.
+    :return: Dictionary containing information of the image
+    """
+    return check_images_metadata([file], size_threshold_mb, verify_crc, checks)[file.name]
 
-        # Filter file extensions
-        if not file.match(f'*.{ext_filter}'):
-            continue
 
-        # Filter number ranges on file name
-        if not is_name_in_range(file, name_filter):
-            continue
+def analyze_image(file: Path, value_threshold: float, size_threshold_mb: float,
+                  metric_options: Optional[dict] = None, im_info: Optional[dict] = None,
+                  checks: Optional[Iterable[str]] = None,
+                  data: Optional[bytes] = None) -> (str, dict):
+    """
+    Reads in and checks a single image. The full image is replaced with a thumbnail
+    if the image has warnings, or dropped if not, so only small results are returned.
+    Used as the unit of work for the worker pool.
+
+    :param file: Image file to analyze
+    :param value_threshold: Float from 0-1 threshold for image value. Images with an
+        average value at or below this are given a warning.
+    :param size_threshold_mb: Threshold for image size. See check_images_metadata.
+    :param metric_options: Options for the value metric. Defaults to
+        DEFAULT_METRIC_OPTIONS. Keys:
+        "metric" - Metric used to get the average value. See get_average_value.
+        "decode_scale" - Decode at a reduced resolution. See read_image.
+        "pixel_step" - Only sample every nth pixel. See get_average_value.
+        "compare" - Also get the exact value from the full resolution image and record
+            it as "exact_value", to see how far the metric is off.
+        "region_grid" - Rows and columns of regions the value is also averaged over.
+            See get_region_values.
+        "region_thresh", "region_diff" - Thresholds of the dark region check. See
+            find_bad_regions.
+    :param im_info: Image info from check_images_metadata, if already checked. It is
+        copied rather than changed.
+    :param checks: Names of the checks that are turned on. Default is all.
+    :param data: Contents of the file, if already read. See prefetch_files.
+    :return: Tuple of image name and its image info. The image info also has
+        "signature", see get_frame_signature, and "timings", the "decode_seconds" and
+        "cpu_seconds" spent on the image. Images with dark regions have "bad_regions",
+        see get_bad_region_boxes.
+    """
+    options = {**DEFAULT_METRIC_OPTIONS, **(metric_options or {})}
+    cpu_start = time.process_time()
+    if im_info is None:
+        im_info = check_image_metadata(file, size_threshold_mb, checks=checks)
+    else:
+        im_info = {**im_info, "warnings": list(im_info["warnings"]),
+                   "skipped_checks": list(im_info["skipped_checks"])}
+
+    # Read in image
+    decode_start = time.perf_counter()
+    im_info["image"] = read_image(file, options["decode_scale"], data)
+    im_info["timings"] = {"decode_seconds": time.perf_counter() - decode_start}
+    table = FrameTable([file.name])
+    params = {"size_thresh": size_threshold_mb, "value_thresh": value_threshold,
+              "region_thresh": options["region_thresh"],
+              "region_diff": options["region_diff"]}
+    pixel_checks = get_checks("pixels", checks)
+    if im_info["image"] is None:
+        # Images already found corrupt by the structure check keep their one warning
+        corrupt_label = CHECKS["corrupt"].label
+        table.corrupt[0] = not any(warning.startswith(corrupt_label)
+                                   for warning in im_info["warnings"])
+        table.errors[0] = "Could not be decoded"
+        run_checks(table, [check for check in get_checks("metadata", checks)
+                           if check.name == "corrupt"], params)
+        im_info["warnings"].extend(table.get_warnings(0, params))
+        im_info["skipped_checks"].extend(check.label for check in pixel_checks)
+        im_info["timings"]["cpu_seconds"] = time.process_time() - cpu_start
+        return file.name, im_info
+
+    # Check for odd images. The whole image and its regions are averaged from the
+    # same value plane.
+    plane = get_value_plane(im_info["image"], options["metric"], options["pixel_step"])
+    im_info["value"] = table.value[0] = cv2.mean(plane)[0] / 255
+    regions = get_region_values(plane, options["region_grid"])
+    table.set_regions(0, regions)
+    # Full resolution dimensions, for the pixel bounds of regions
+    height, width = im_info["image"].shape[:2]
+    table.width[0] = im_info.get("width", width * options["decode_scale"])
+    table.height[0] = im_info.get("height", height * options["decode_scale"])
+    run_checks(table, pixel_checks, params)
+    im_info["warnings"].extend(table.get_warnings(0, params))
+    if table.warnings[0] & CHECKS["region"].bit:
+        im_info["bad_regions"] = get_bad_region_boxes(table, 0, params)
+
+    if options["compare"]:
+        im_info["exact_value"] = get_average_value(read_image(file, data=data))
 
-        # Create dictionary to hold image info
-        images_info[file.name] = {}
-        # Read in image
-        images_info[file.name]["image"] = cv2.imread(str(file))
-        # Record file size
-        images_info[file.name]["size"] = file.stat().st_size / BYTES_IN_MEGABYTE
-        # List to hold image warnings
-        images_info[file.name]["warnings"] = []
+    # Signature for comparing with neighbouring frames later
+    im_info["signature"] = get_frame_signature(im_info["image"])
 
-    return images_info
+    # Only keep a thumbnail of images with warnings
+    im_info["image"] = create_thumbnail(im_info["image"]) if im_info["warnings"] else None
+    im_info["timings"]["cpu_seconds"] = time.process_time() - cpu_start
+    return file.name, im_info
 
 
-def is_name_in_range(file: Path, name_filter: dict) -> bool:
+def get_images_info(image_files: Iterable[Path], value_threshold: float,
+                    size_threshold_mb: float, workers: int = 1, full_decode: bool = False,
+                    cache: Optional[FrameCache] = None,
+                    metric_options: Optional[dict] = None, verify_crc: bool = False,
+                    metrics: Optional[Metrics] = None,
+                    sequence_dims: Optional[Tuple[int, int]] = None,
+                    checks: Optional[Iterable[str]] = None,
+                    prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                    prefetch_mb: float = DEFAULT_PREFETCH_MB,
+                    executor: Optional[Executor] = None, sample_step: int = 0,
+                    sequences: Optional[List[List[int]]] = None
+                    ) -> Iterator[Tuple[str, dict]]:
     """
-    Checks if file name is in filter range
+    Reads in and checks each image one at a time, yielding its image info as soon as
+    it is ready. Only a thumbnail of images with warnings is kept, so memory stays
+    bounded no matter how many images there are.
+    Output format is the same as analyze_image.
 
-    :param file: File to check
-    :param name_filter: Dict containing min and max ranges for each name word
-    :return: True if name is in range, false if not
+    Cheap metadata checks run on every image first. Images that already have a
+    warning are broken no matter what their pixels contain, so they are only decoded
+    at the lowest resolution, for their pixel checks and thumbnail, unless full_decode
+    is set. If every check that needs the pixels is turned off, no image is decoded.
+
+    With a sample_step, only a sample of each sequence is decoded, then the frames
+    around the samples with problems. See sample_images_info.
+
+    :param image_files: Image files to analyze
+    :param value_threshold: Threshold for image value. See analyze_image.
+    :param size_threshold_mb: Threshold for image size. See check_images_metadata.
+    :param workers: Number of worker processes. 1 reads images in this process.
+    :param full_decode: Decode every image with metric_options. By default images that
+        already failed a metadata check are only decoded at the lowest resolution.
+    :param cache: Cache of image info. Unchanged images are served from it without
+        being decoded, and newly analyzed images are added to it.
+    :param metric_options: Options for the value metric. See analyze_image.
+    :param verify_crc: Verify chunk CRCs in the structure check. See
+        FrameTable.from_files.
+    :param metrics: Metrics to record the time of each stage, decode latency and
+        counters to
+    :param sequence_dims: Width and height the images should have. Default is the most
+        common dimensions of image_files.
+    :param checks: Names of the checks that are turned on, including the sequence
+        checks that need a signature of each image. Default is all.
+    :param prefetch_depth: Number of images to read ahead on background threads while
+        the current image is decoded. 0 reads each image as it is decoded. Only used
+        with 1 worker, as worker processes already read in parallel.
+    :param prefetch_mb: Size limit of the images read ahead. See prefetch_files.
+    :param executor: Pool of worker processes to use instead of starting one. Only
+        used with more than 1 worker.
+    :param sample_step: Quick scan that decodes every nth frame of each sequence, then
+        bisects towards the problems. 0 decodes every image.
+    :param sequences: Lists of the positions in image_files of the frames of each
+        sequence, in frame order, for the quick scan. Images left out are sampled as
+        one more sequence, in image_files order.
+    :return: Iterator of tuples of image name and image info. Images skipped by the
+        metadata checks come first, the rest follow in image_files order, or in the
+        order they are sampled in a quick scan.
     """
-    # Get words from file name
-    file_name_words = file.stem.split("_")
+    metrics = metrics or Metrics()
+
+    # Run the metadata checks on every image, then compare dimensions across the
+    # whole sequence
+    image_files = list(image_files)
+    with metrics.stage("metadata"):
+        metadata_infos = check_images_metadata(image_files, size_threshold_mb, verify_crc,
+                                               checks, sequence_dims)
+    # Counted apart from the bytes read to decode images, which read each file again
+    if verify_crc:
+        crc_mb = sum(im_info["size"] for im_info in metadata_infos.values())
+        metrics.count("crc_bytes_read", int(crc_mb * BYTES_IN_MEGABYTE))
+
+    # Only decode images if a check needs their pixels
+    pixel_labels = [check.label for check in get_checks("pixels", checks)]
+    needs_pixels = pixel_labels or any(name in SIGNATURE_CHECKS
+                                       for name in (SEQUENCE_CHECKS if checks is None
+                                                    else checks))
+    decode_files, reduced_files = image_files, []
+    if not needs_pixels:
+        for file in image_files:
+            yield file.name, metadata_infos[file.name]
+        return
+    if not full_decode:
+        decode_files = [file for file in image_files
+                        if not metadata_infos[file.name]["warnings"]]
+        reduced_files = [file for file in image_files
+                         if metadata_infos[file.name]["warnings"]]
+
+    with ExitStack() as stack:
+        if workers <= 1:
+            executor = None
+        elif executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
 
-    # Ensure number of file name words is expected
-    if len(file_name_words) != len(name_filter):
-        print(f"Invalid named file found. Incorrect number of words: {file.name}")
-        return False
+        # Frames that already failed a metadata check are decoded at the lowest
+        # resolution only, which is enough for their pixel checks and thumbnail. These
+        # results aren't cached, as they weren't decoded with the run's options.
+        reduced_options = {**(metric_options or {}), "decode_scale": max(DECODE_SCALES),
+                           "compare": False}
+        for file_name, im_info in analyze_images(reduced_files, metadata_infos,
+                                                 value_threshold, size_threshold_mb, None,
+                                                 reduced_options, metrics, checks,
+                                                 prefetch_depth, prefetch_mb, executor):
+            metrics.count("frames_reduced_decode")
+            yield file_name, im_info
 
-    for pos, values in name_filter.items():
-        # Make sure there is a filter for that word
-        num_range = values["range"]
-        if not num_range:
+        def analyze(files):
+            return analyze_images(files, metadata_infos, value_threshold,
+                                  size_threshold_mb, cache, metric_options, metrics, checks,
+                                  prefetch_depth, prefetch_mb, executor)
+
+        if sample_step > 0:
+            yield from sample_images_info(image_files, metadata_infos, decode_files,
+                                          sequences or [], sample_step, analyze,
+                                          pixel_labels, metrics)
+        else:
+            yield from analyze(decode_files)
+
+
+def analyze_images(files: List[Path], metadata_infos: dict, value_threshold: float,
+                   size_threshold_mb: float, cache: Optional[FrameCache] = None,
+                   metric_options: Optional[dict] = None,
+                   metrics: Optional[Metrics] = None,
+                   checks: Optional[Iterable[str]] = None,
+                   prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                   prefetch_mb: float = DEFAULT_PREFETCH_MB,
+                   executor: Optional[Executor] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Decodes and checks images that passed the metadata checks, serving unchanged
+    images from the cache. See get_images_info for the parameters.
+
+    :param files: Image files to decode
+    :param metadata_infos: Dictionary of image name to its image info from
+        check_images_metadata
+    :param executor: Pool of worker processes. Default is to read images in this
+        process.
+    :return: Iterator of tuples of image name and image info, in files order
+    """
+    metrics = metrics or Metrics()
+
+    # Serve unchanged frames from the cache and only decode the rest
+    cached_infos = [None] * len(files)
+    stats = [None] * len(files)
+    if cache is not None:
+        with metrics.stage("cache"):
+            for i, file in enumerate(files):
+                stats[i] = file.stat()
+                cached_infos[i] = cache.get(file, stats[i])
+        metrics.count("cache_hits", sum(im_info is not None for im_info in cached_infos))
+        metrics.count("cache_misses", sum(im_info is None for im_info in cached_infos))
+    miss_files = [file for file, im_info in zip(files, cached_infos) if im_info is None]
+    miss_infos = [metadata_infos[file.name] for file in miss_files]
+
+    if executor is None or not miss_files:
+        # Read the next images while the current one is decoded
+        if prefetch_depth > 0:
+            miss_data = (data for _, data in prefetch_files(
+                miss_files, [im_info["size"] for im_info in miss_infos],
+                prefetch_depth, prefetch_mb))
+        else:
+            miss_data = repeat(None)
+        results = (analyze_image(file, value_threshold, size_threshold_mb,
+                                 metric_options, im_info, checks, data)
+                   for file, im_info, data in zip(miss_files, miss_infos, miss_data))
+    else:
+        # Send a few frames to each worker at a time to cut down on messaging
+        # overhead. Results come back in submission order, same as the serial path.
+        results = executor.map(analyze_image, miss_files, repeat(value_threshold),
+                               repeat(size_threshold_mb), repeat(metric_options),
+                               miss_infos, repeat(checks), chunksize=PARALLEL_CHUNK_SIZE)
+
+    for file, stat, cached_info in zip(files, stats, cached_infos):
+        metadata_info = metadata_infos[file.name]
+        if cached_info is not None:
+            yield file.name, merge_image_info(metadata_info, cached_info)
             continue
+        with metrics.stage("analysis"):
+            file_name, im_info = next(results)
 
-        # Ensure word is integer
-        try:
-            word_num = int(file_name_words[pos])
-        except ValueError:
-            print(f"Invalid named file found. "
-                  f"Non-integer found: {file_name_words[pos]} in {file.name}")
-            return False
+        timings = im_info.pop("timings")
+        metrics.observe("decode_seconds", timings["decode_seconds"])
+        metrics.count("frames_decoded")
+        metrics.count("bytes_read", int(im_info["size"] * BYTES_IN_MEGABYTE))
+        if executor is not None:
+            metrics.count("worker_cpu_seconds", timings["cpu_seconds"])
 
-        # Check if out of range
-        if word_num < num_range["min"] or word_num > num_range["max"]:
-            return False
-    return True
+        if cache is not None:
+            # Only cache the results of the pixel checks. The metadata checks are
+            # cheap and depend on the rest of the sequence, so they always run.
+            with metrics.stage("cache"):
+                cache.put(file, stat, split_image_info(metadata_info, im_info))
+        yield file_name, im_info
 
 
-def find_small_images(images_info: dict, size_threshold_mb: int = .2) -> None:
+def sample_images_info(image_files: List[Path], metadata_infos: dict,
+                       decode_files: List[Path], sequences: List[List[int]],
+                       sample_step: int,
+                       analyze: Callable[[List[Path]], Iterator[Tuple[str, dict]]],
+                       pixel_labels: List[str],
+                       metrics: Optional[Metrics] = None) -> Iterator[Tuple[str, dict]]:
     """
-    Checks each image in images_info to see if file size is below threshold and adds
-    warning if so.
+    Quick scan that only decodes every nth frame of each sequence, plus frames with a
+    file size far off from their neighbours. The frames between two checked frames are
+    then bisected, a round at a time, wherever either frame has a warning or the two
+    look very different, until the exact frames with problems are found. See
+    SequenceSampler. Frames that are never decoded only get the metadata checks.
 
-    :param images_info: Dictionary containing information of each image
-    :param size_threshold_mb: Threshold for image size in megabytes. Images below
-        this size are given a warning.
-        Default is 0.2 MB.
+    :param image_files: Image files to analyze
+    :param metadata_infos: Dictionary of image name to its image info from
+        check_images_metadata
+    :param decode_files: Image files that can be decoded. The rest were already
+        reported by the metadata checks, and count as checked frames with warnings.
+    :param sequences: Lists of the positions in image_files of the frames of each
+        sequence, in frame order. See get_images_info.
+    :param sample_step: Decode every nth frame of each sequence first
+    :param analyze: Function that decodes and checks a list of image files. See
+        analyze_images.
+    :param pixel_labels: Labels of the checks that need the pixels, for frames that are
+        never decoded
+    :param metrics: Metrics to record the number of rounds to
+    :return: Iterator of tuples of image name and image info, in the order they are
+        checked
     """
-    for file_name, im_info in images_info.items():
-        size = im_info["size"]
+    metrics = metrics or Metrics()
+    grouped = {position for sequence in sequences for position in sequence}
+    ungrouped = [position for position in range(len(image_files)) if position not in grouped]
+    sequences = list(sequences) + ([ungrouped] if ungrouped else [])
+
+    # Frames with metadata warnings are known problems, so they are always checked
+    decode_names = {file.name for file in decode_files}
+    samplers, rounds = [], []
+    for sequence in sequences:
+        names = [image_files[position].name for position in sequence]
+        sampler = SequenceSampler(np.array([metadata_infos[name]["size"] for name in names]),
+                                  sample_step)
+        warned = []
+        for position, name in enumerate(names):
+            if name not in decode_names:
+                sampler.add(position, True)
+            elif metadata_infos[name]["warnings"]:
+                warned.append(position)
+        samplers.append(sampler)
+        rounds.append(sorted(set(sampler.first_positions() + warned)))
 
-        # If below threshold, record warning
-        if size <= size_threshold_mb:
-            warning = f"Small image - Image size is {size:.6f} megabytes"
-            images_info[file_name]["warnings"].append(warning)
+    while any(rounds):
+        metrics.count("sample_rounds")
+        round_positions = [(sampler, sequence, position)
+                           for sampler, sequence, positions in zip(samplers, sequences, rounds)
+                           for position in positions]
+        results = analyze([image_files[sequence[position]]
+                           for _, sequence, position in round_positions])
+        for (sampler, _, position), (file_name, im_info) in zip(round_positions, results):
+            sampler.add(position, bool(im_info["warnings"]), im_info.get("signature"))
+            yield file_name, im_info
+        rounds = [sampler.next_positions() for sampler in samplers]
 
+    for sampler, sequence in zip(samplers, sequences):
+        for position, image_position in enumerate(sequence):
+            if not sampler.is_checked(position):
+                im_info = metadata_infos[image_files[image_position].name]
+                im_info["skipped_checks"].extend(pixel_labels)
+                metrics.count("frames_not_sampled")
+                yield image_files[image_position].name, im_info
 
-def find_black_images(images_info: dict, value_threshold: float = .02) -> None:
+
+def split_image_info(metadata_info: dict, im_info: dict) -> dict:
     """
-    Checks each image in images_info to see if value is below threshold and adds warning
-    if so.
+    Removes the results of the metadata checks from the image info of an analyzed image.
 
-    :param images_info: Dictionary containing information of each image
-    :param value_threshold: Float from 0-1 threshold for image value. Images with an
-        average pixel value below this are given a warning.
-        0.0 is a black image, 0.5 is a 50% grey image, and 1.0 is a white image.
-        Default is 0.02.
+    :param metadata_info: Image info from check_images_metadata
+    :param im_info: Image info from analyze_image
+    :return: Image info with only the warnings and skipped checks of the pixel checks
     """
-    for file_name, im_info in images_info.items():
-        # Convert image to HSV
-        hsv_image = cv2.cvtColor(im_info["image"], cv2.COLOR_BGR2HSV)
-        # Get average value of image
-        avg_value = hsv_image[:, :, 2].mean() / 255
+    return {
+        **im_info,
+        "warnings": im_info["warnings"][len(metadata_info["warnings"]):],
+        "skipped_checks": im_info["skipped_checks"][len(metadata_info["skipped_checks"]):]
+    }
 
-        # If below threshold, record warning
-        if avg_value <= value_threshold:
-            warning = f"Dark image - Average value of {avg_value * 100:.2f}%"
-            images_info[file_name]["warnings"].append(warning)
 
+def merge_image_info(metadata_info: dict, pixel_info: dict) -> dict:
+    """
+    Combines the results of the metadata checks with the results of the pixel checks.
+    Reverses split_image_info.
 
-def print_report(images_info: dict) -> None:
+    :param metadata_info: Image info from check_images_metadata
+    :param pixel_info: Image info from split_image_info
+    :return: Image info in the same format as analyze_image
     """
-    Outputs warnings of each image to command line.
+    im_info = {
+        **metadata_info,
+        **pixel_info,
+        "warnings": metadata_info["warnings"] + pixel_info["warnings"],
+        "skipped_checks": metadata_info["skipped_checks"] + pixel_info["skipped_checks"]
+    }
+    if not im_info["warnings"]:
+        im_info["image"] = None
+    return im_info
 
-    :param images_info: Dictionary containing information of each image
+
+def find_temporal_anomalies(frame_index: FrameIndex, mask: np.ndarray, signature_rows: dict,
+                            checks: Optional[Iterable[str]] = None,
+                            adjacent_only: bool = False) -> Dict[str, List[str]]:
     """
-    for file_name, im_info in images_info.items():
-        # Skip images without warnings
-        if not im_info["warnings"]:
-            continue
+    Compares each frame with its neighbours in its sequence. See
+    find_sequence_anomalies.
 
-        # Output warnings
-        print(file_name)
-        for warning in im_info["warnings"]:
-            print("\t" + warning)
+    :param frame_index: Index of the frames of a directory
+    :param mask: Boolean mask of frames that were analyzed, from FrameIndex.filter
+    :param signature_rows: Dictionary of frame name to its signature row. See
+        to_signature_row.
+    :param checks: Names of the checks that are turned on. Default is all.
+    :param adjacent_only: Only look for duplicates among decoded frames that are next to
+        each other, for quick scans. See find_sequence_anomalies.
+    :return: Dictionary of frame name to its warnings. Frames without warnings are left
+        out.
+    """
+    anomalies = {}
+    for indices in frame_index.group_sequences(mask).values():
+        names = [frame_index.names[i] for i in indices
+                 if frame_index.names[i] in signature_rows]
+        table = np.array([signature_rows[name] for name in names], dtype=SIGNATURE_DTYPE)
+        anomalies.update(find_sequence_anomalies(names, table, checks, adjacent_only))
+    return anomalies
 
 
-def create_warning_image_grid(images_info: dict,
-                              file_name: str = "warningImageThumbnails.jpg") -> None:
+def get_value_plane(image: np.ndarray, metric: str = "hsv",
+                    pixel_step: int = 1) -> np.ndarray:
     """
-    Outputs a grid of thumbnails of images with warnings to the current directory.
+    Gets the single channel plane of an image that its value is averaged from, 0-255.
+    See get_average_value for the metrics.
 
-    :param images_info: Dictionary containing information of each image
-    :param file_name: Name of the grid image to save
+    :param image: Numpy image array
+    :param metric: Metric to use, one of VALUE_METRICS
+    :param pixel_step: Only sample every nth pixel along each axis
+    :return: Numpy array of the value of each pixel
+    """
+    if pixel_step > 1:
+        image = image[::pixel_step, ::pixel_step]
+
+    if metric == "hsv":
+        # Convert image to HSV and take the value channel
+        return cv2.cvtColor(image, cv2.COLOR_BGR2HSV)[:, :, 2]
+    if metric == "max":
+        # Value is the max of the color channels
+        return cv2.max(cv2.max(image[:, :, 0], image[:, :, 1]), image[:, :, 2])
+    if metric == "luma":
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    raise ValueError(f"Invalid value metric: {metric}")
+
+
+def get_region_values(plane: np.ndarray, grid: Tuple[int, int] = (4, 4)) -> np.ndarray:
+    """
+    Gets the average value of each region of a grid over the value plane. The plane is
+    reshaped into blocks and summed in one pass rather than a loop over regions, so this
+    costs about the same as the average value. The last rows and columns of pixels past
+    an even multiple of the grid, fewer than the number of regions, are left out.
+
+    :param plane: Value plane from get_value_plane
+    :param grid: Number of rows and columns of regions. Reduced to the plane's height
+        and width if it is smaller.
+    :return: Numpy array of the average value of each region from 0-1, shaped
+        (rows, columns)
+    """
+    height, width = plane.shape[:2]
+    rows, cols = min(grid[0], height), min(grid[1], width)
+    block_height, block_width = height // rows, width // cols
+    blocks = plane[:rows * block_height, :cols * block_width].reshape(
+        rows, block_height, cols, block_width)
+
+    # Sum the rows of each block, then the columns. A column of a block can't overflow
+    # 32 bits, a whole block can.
+    sums = blocks.sum(axis=1, dtype=np.uint32).sum(axis=2, dtype=np.uint64)
+    return sums / (block_height * block_width * 255)
+
+
+def get_average_value(image: np.ndarray, metric: str = "hsv", pixel_step: int = 1) -> float:
+    """
+    Gets the average value of an image from 0-1.
+
+    Metrics:
+    "hsv" - Exact. Average of the V channel of the image converted to HSV.
+    "max" - Exact, same result as "hsv". Takes the max of the B, G and R channels
+        directly, skipping the hue and saturation work of the HSV conversion.
+    "luma" - Fastest. Average of the grayscale image. Always less than or equal to the
+        exact value, and at least 11.4% of it (the weight of blue in luma).
+
+    :param image: Numpy image array
+    :param metric: Metric to use, one of VALUE_METRICS
+    :param pixel_step: Only sample every nth pixel along each axis. Results are then an
+        estimate that can differ from the full image in either direction.
+    :return: Average value of image
     """
-    grid_width = 4  # Number of thumbnails per row
-    grid_im_width = 100  # Width of each thumbnail
+    return cv2.mean(get_value_plane(image, metric, pixel_step))[0] / 255
 
-    # Filter out images with warnings
-    warn_images = [v["image"] for k, v in images_info.items() if v["warnings"]]
-    if not warn_images:
+
+def print_image_report(file_name: str, im_info: dict) -> None:
+    """
+    Outputs warnings of a single image to command line.
+
+    :param file_name: Name of the image
+    :param im_info: Dictionary containing information of the image
+    """
+    # Skip images without warnings
+    if not im_info["warnings"]:
         return
 
-    # Shrink images down
-    im_height, im_width, im_depth = warn_images[0].shape
-    grid_im_height = int(grid_im_width * im_height / im_width)
-    new_dims = grid_im_width, grid_im_height
-    grid_images = [cv2.resize(im, new_dims, interpolation=cv2.INTER_LINEAR)
-                   for im in warn_images]
+    # Output warnings
+    print(file_name, flush=True)
+    for warning in im_info["warnings"]:
+        print("\t" + warning, flush=True)
+    if im_info["skipped_checks"]:
+        print(f"\tSkipped checks - {', '.join(im_info['skipped_checks'])}", flush=True)
 
-    # Add extra blank space if grid is not square
-    missing_cnt = grid_width - len(grid_images) % grid_width
-    for _ in range(missing_cnt):
-        blank_im = np.zeros([grid_im_height, grid_im_width, im_depth], dtype=np.uint8)
-        blank_im.fill(255)
-        grid_images.append(blank_im)
 
-    # Combine images
-    rows = []
-    row_cnt = len(grid_images) // grid_width
-    for i in range(row_cnt):
-        start, end = i * grid_width, (i + 1) * grid_width
-        rows.append(cv2.hconcat(grid_images[start:end]))
-    grid = cv2.vconcat(rows)
+def print_temporal_report(anomalies: dict) -> None:
+    """
+    Outputs frames that stand out from their neighbouring frames to command line.
+
+    :param anomalies: Dictionary of frame name to its warnings. See
+        find_temporal_anomalies.
+    """
+    if not anomalies:
+        return
+
+    print("Temporal anomalies")
+    for file_name, warnings in anomalies.items():
+        print(f"\t{file_name}")
+        for warning in warnings:
+            print(f"\t\t{warning}")
+
+
+def print_gap_report(gaps: dict, pads: Optional[dict] = None) -> None:
+    """
+    Outputs missing frames of each sequence to command line.
+
+    :param gaps: Dictionary of sequence name to missing frame ranges. See
+        FrameIndex.find_gaps.
+    :param pads: Dictionary of sequence name to number of digits to zero pad its frame
+        numbers to
+    """
+    if not gaps:
+        return
 
-    # Save grid image
-    cv2.imwrite(f"./{file_name}", grid)
+    print("Missing frames")
+    for seq_name, seq_gaps in gaps.items():
+        pad = pads.get(seq_name, 0) if pads else 0
+        print(f"\t{seq_name} - {format_ranges(seq_gaps, pad)}")
 
 
-def main():
+def print_sample_report(decoded_cnt: int, frame_cnt: int, decoded_ranges: dict,
+                        pads: Optional[dict] = None) -> None:
+    """
+    Outputs which frames a quick scan decoded, so it is clear how much of each sequence
+    the pixel checks covered.
+
+    :param decoded_cnt: Number of frames decoded
+    :param frame_cnt: Number of frames analyzed
+    :param decoded_ranges: Dictionary of sequence name to ranges of decoded frames. See
+        FrameIndex.find_ranges.
+    :param pads: Dictionary of sequence name to number of digits to zero pad its frame
+        numbers to
+    """
+    print(f"Quick scan - Decoded {decoded_cnt} of {frame_cnt} frames. Only these frames "
+          f"were checked for pixel and temporal problems")
+    for seq_name, seq_ranges in decoded_ranges.items():
+        pad = pads.get(seq_name, 0) if pads else 0
+        print(f"\t{seq_name} - {format_ranges(seq_ranges, pad)}")
+
+
+def print_metric_comparison(value_errors: List[float]) -> None:
+    """
+    Outputs how far the value metric was off from the exact value.
+
+    :param value_errors: Differences of each image's value from its exact value
+    """
+    errors = np.array(value_errors) * 100
+    print(f"Value metric compared to exact value over {len(errors)} images:")
+    print(f"\tMax difference - {np.abs(errors).max():.2f}%")
+    print(f"\tMean difference - {errors.mean():+.2f}%")
+
+
+def get_image_record(file_name: str, im_info: dict, name_words: List[str]) -> dict:
+    """
+    Gets the report record of a single image for the 'jsonl' report format.
+    Record format:
+    {
+        "type": "frame"
+        "file": name of the image
+        "fields": dictionary of each naming convention word to its part of the name
+        "size_mb": size of image in megabytes
+        "width", "height": dimensions of the image, or None if not known
+        "value": average value of the image, or None if not decoded
+        "exact_value": exact average value, only with '--compare_metric'
+        "bad_regions": list of the x0, y0, x1, y1 pixel bounds and value of each dark
+            region, only if the image has any
+        "warnings": list of warnings
+        "skipped_checks": list of checks that were not run
+    }
+
+    :param file_name: Name of the image
+    :param im_info: Dictionary containing information of the image
+    :param name_words: Words of the naming convention
+    :return: Record dictionary
+    """
+    record = {
+        "type": "frame",
+        "file": file_name,
+        "fields": dict(zip(name_words, Path(file_name).stem.split("_"))),
+        "size_mb": im_info["size"],
+        "width": im_info.get("width"),
+        "height": im_info.get("height"),
+        "value": im_info.get("value"),
+        "warnings": im_info["warnings"],
+        "skipped_checks": im_info["skipped_checks"]
+    }
+    if "exact_value" in im_info:
+        record["exact_value"] = im_info["exact_value"]
+    if "bad_regions" in im_info:
+        record["bad_regions"] = im_info["bad_regions"]
+    return record
+
+
+def get_summary_record(frame_cnt: int, images_info: dict, gaps: dict, gap_pads: dict,
+                       value_errors: List[float], metrics: Metrics,
+                       decoded_ranges: Optional[dict] = None) -> dict:
+    """
+    Gets the record that closes a 'jsonl' report, in place of the missing frames,
+    quick scan and metric comparison text reports.
+
+    :param frame_cnt: Number of images analyzed
+    :param images_info: Dictionary containing information of each image with warnings
+    :param gaps: Dictionary of sequence name to missing frame ranges
+    :param gap_pads: Dictionary of sequence name to number of digits of its frames
+    :param value_errors: Differences of each image's value from its exact value
+    :param metrics: Metrics of the run, for its duration
+    :param decoded_ranges: Dictionary of sequence name to ranges of frames decoded by a
+        quick scan. See print_sample_report.
+    :return: Record dictionary
+    """
+    # Count each kind of warning, such as 'Dark image'
+    warning_cnts = Counter(warning.split(" - ")[0] for im_info in images_info.values()
+                           for warning in im_info["warnings"])
+    run_metrics = metrics.to_dict()
+    record = {
+        "type": "summary",
+        "frames_analyzed": frame_cnt,
+        "frames_with_warnings": len(images_info),
+        "warnings": dict(warning_cnts),
+        "missing_frames": {seq_name: format_ranges(seq_gaps, gap_pads.get(seq_name, 0))
+                           for seq_name, seq_gaps in gaps.items()},
+        "seconds": run_metrics["total_seconds"],
+        "frames_per_second": run_metrics["frames_per_second"]
+    }
+    if value_errors:
+        errors = np.array(value_errors)
+        record["value_metric_error"] = {"max": float(np.abs(errors).max()),
+                                        "mean": float(errors.mean())}
+    if decoded_ranges is not None:
+        record["decoded_frames"] = {seq_name: format_ranges(seq_ranges,
+                                                            gap_pads.get(seq_name, 0))
+                                    for seq_name, seq_ranges in decoded_ranges.items()}
+    return record
+
+
+def write_record(record: dict, stream: TextIO) -> None:
+    """
+    Writes a record as one line of JSON and flushes it, so readers get each record as
+    soon as it is written.
+
+    :param record: Record dictionary
+    :param stream: Stream to write to
+    """
+    stream.write(json.dumps(record) + "\n")
+    stream.flush()
+
+
+def write_partial_report(report_path: str, images_info: dict, gaps: dict,
+                         gap_pads: dict, shard: Optional[str] = None) -> None:
+    """
+    Saves the warnings, thumbnails and missing frames of a run to a .json file, so
+    reports of several runs, such as shards of a show, can be merged into one.
+    See mergeReports.py.
+
+    :param report_path: Path of the .json file to save
+    :param images_info: Dictionary containing information of each image with warnings
+    :param gaps: Dictionary of sequence name to missing frame ranges
+    :param gap_pads: Dictionary of sequence name to number of digits of its frames
+    :param shard: Shard of the run, as 'i/N'
+    """
+    frames = {}
+    for file_name, im_info in images_info.items():
+        frames[file_name] = {k: v for k, v in im_info.items() if k != "image"}
+        if im_info["image"] is not None:
+            png = cv2.imencode(".png", im_info["image"])[1].tobytes()
+            frames[file_name]["thumbnail"] = base64.b64encode(png).decode("ascii")
+
+    report = {
+        "version": ANALYZER_VERSION,
+        "shard": shard,
+        "frames": frames,
+        "gaps": gaps,
+        "gap_pads": gap_pads
+    }
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file)
+
+
+def load_partial_report(report_path: str) -> dict:
+    """
+    Loads a report saved by write_partial_report. Thumbnails are decoded back into
+    images.
+
+    :param report_path: Path of the .json file
+    :return: Report dictionary, with "frames" in the same format as images_info
+    """
+    with open(report_path, encoding="utf-8") as file:
+        report = json.load(file)
+
+    for im_info in report["frames"].values():
+        im_info["image"] = None
+        if "thumbnail" in im_info:
+            png = np.frombuffer(base64.b64decode(im_info.pop("thumbnail")), np.uint8)
+            im_info["image"] = cv2.imdecode(png, cv2.IMREAD_COLOR)
+    report["gaps"] = {seq_name: [tuple(gap) for gap in seq_gaps]
+                      for seq_name, seq_gaps in report["gaps"].items()}
+    return report
+
+
+def create_thumbnail(image: np.ndarray, width: int = THUMBNAIL_WIDTH) -> np.ndarray:
+    """
+    Shrinks an image down to a thumbnail, keeping its aspect ratio.
+
+    :param image: Numpy image array
+    :param width: Width of the thumbnail
+    :return: Thumbnail image array
+    """
+    im_height, im_width = image.shape[:2]
+    if im_width == width:
+        return image
+    new_dims = width, int(width * im_height / im_width)
+    return cv2.resize(image, new_dims, interpolation=cv2.INTER_LINEAR)
+
+
+def create_warning_image_grid(images_info: dict,
+                              file_name: str = "warningImageThumbnails.jpg",
+                              page_size: int = DEFAULT_PAGE_SIZE) -> None:
+    """
+    Outputs a grid of thumbnails of images with warnings. The grid is split into pages
+    of page_size thumbnails. See ContactSheetWriter.
+
+    :param images_info: Dictionary containing information of each image
+    :param file_name: Path of the grid image to save, relative to the current directory
+        or absolute
+    :param page_size: Number of thumbnails per grid image
+    """
+    with ContactSheetWriter(file_name, GRID_WIDTH, THUMBNAIL_WIDTH,
+                            page_size) as writer:
+        for im_info in images_info.values():
+            if im_info["warnings"] and im_info["image"] is not None:
+                writer.add(im_info["image"])
+
+
+def parse_shard(shard_str: str) -> Tuple[int, int]:
+    """
+    Converts user input shard into integers.
+
+    :param shard_str: Shard as 'i/N'. Ex: '0/4' is the first of 4 shards.
+    :return: Tuple of shard number and shard count
+    """
+    try:
+        shard, shard_cnt = map(int, shard_str.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard: {shard_str}") from None
+    if not 0 <= shard < shard_cnt:
+        raise argparse.ArgumentTypeError(f"Invalid shard: {shard_str}")
+    return shard, shard_cnt
+
+
+def main(args: argparse.Namespace, naming_words: List[str], extension: str,
+         executor: Optional[Executor] = None) -> None:
     """
     Filters each image in directory then prints warnings for abnormal images
+
+    :param args: Arguments from parse_args
+    :param naming_words: Words of the naming convention
+    :param extension: File extension of frames
+    :param executor: Pool of worker processes to reuse, such as the warm pool of
+        frameServer.py. Default is to start one pool for the whole run when using more
+        than 1 worker, shared by every directory and every batch while watching.
     """
     # Convert input ranges into integers
-    raw_filter = vars(args).copy()
-    raw_filter.pop("frames_dir")
-    raw_filter.pop("value_thresh")
-    raw_filter.pop("size_thresh")
+    raw_filter = {word: getattr(args, word) for word in naming_words}
     name_filter = get_filter_ranges(raw_filter)
 
-    # Filter and read in image info
-    images_info = get_images_info(args.frames_dir, name_filter, extension)
+    metric_options = {
+        "metric": args.value_metric,
+        "decode_scale": args.decode_scale,
+        "pixel_step": args.pixel_step,
+        "compare": args.compare_metric,
+        "region_grid": tuple(args.region_grid),
+        "region_thresh": args.region_thresh,
+        "region_diff": args.region_diff
+    }
+    checks = [name for name in list(CHECKS) + SEQUENCE_CHECKS
+              if name not in args.skip_checks]
 
-    # Check for odd images
-    find_small_images(images_info, args.size_thresh)
-    find_black_images(images_info, args.value_thresh)
+    metrics = Metrics()
+    record_stream = sys.stdout
+    with ExitStack() as stack:
+        if args.format == "jsonl":
+            # Keep stdout for records, anything else printed goes to stderr
+            stack.enter_context(redirect_stdout(sys.stderr))
 
-    # Output
-    print_report(images_info)
-    create_warning_image_grid(images_info)
+        cache = None
+        if args.cache or args.invalidate_cache:
+            params = {
+                "value_thresh": args.value_thresh,
+                "size_thresh": args.size_thresh,
+                "metric_options": metric_options,
+                "verify_crc": args.verify_crc,
+                "checks": checks,
+                "version": ANALYZER_VERSION
+            }
+            cache = stack.enter_context(FrameCache(args.cache_path, params,
+                                                   args.cache_max_mb))
+        if args.invalidate_cache:
+            removed_cnt = cache.invalidate(args.frames_dir)
+            print(f"Removed {removed_cnt} cached frames under {args.frames_dir}")
+            return
 
+        # One pool for every directory, rather than starting one for each. Its worker
+        # processes only start once images need decoding.
+        if executor is None and args.workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(args.workers))
 
-if __name__ == '__main__':
-    naming_words, extension = load_naming_convention(NAMING_CONVENTION_TXT)
+        # Find the directories of frames to analyze
+        with metrics.stage("listing"):
+            if args.watch:
+                # Each batch of frames that finished being written is its own index
+                watcher = stack.enter_context(FrameWatcher(args.frames_dir, extension))
+                print(f"Watching {args.frames_dir} for frames. Press Ctrl+C to stop",
+                      flush=True)
+                frame_indices = (FrameIndex.from_names(args.frames_dir, naming_words,
+                                                       extension,
+                                                       [file.name for file in files])
+                                 for files in watcher.watch(args.watch_idle))
+            elif args.recursive:
+                frame_indices = find_frame_directories(args.frames_dir, naming_words,
+                                                       extension)
+            else:
+                frame_indices = [FrameIndex.from_directory(args.frames_dir, naming_words,
+                                                           extension)]
+            if args.shard:
+                frame_indices = get_shard(frame_indices, *args.shard)
+
+        # Thumbnails are added to the grid as they stream past. They are only kept
+        # afterwards if they are needed for the saved report.
+        grid_writer = stack.enter_context(ContactSheetWriter(
+            "./warningImageThumbnails.jpg", GRID_WIDTH, THUMBNAIL_WIDTH,
+            args.grid_page_size))
+        warn_images_info = {}
+        frame_cnt = 0
+        watched_dims = Counter()  # Dimensions of each frame seen while watching
+        anomalies = {}
+        gaps, gap_pads = {}, {}
+        value_errors = []
+        decoded_cnt = 0
+        decoded_ranges = {}  # Frames decoded by a quick scan
+        for frame_index in frame_indices:
+            # Name frames by their path from frames_dir when searching recursively
+            prefix = ""
+            if args.recursive and frame_index.directory != Path(args.frames_dir):
+                prefix = str(frame_index.directory.relative_to(args.frames_dir)) + os.sep
+
+            with metrics.stage("listing"):
+                frame_mask = frame_index.filter(name_filter)
+                image_files = frame_index.files(frame_mask)
+            metrics.count("frames_listed", len(frame_index))
+            metrics.count("frames_filtered_out", len(frame_index) - len(image_files))
+
+            # A quick scan samples each sequence in frame order
+            sequences = None
+            if args.quick:
+                positions = np.flatnonzero(frame_mask)
+                sequences = [np.searchsorted(positions, indices).tolist() for indices
+                             in frame_index.group_sequences(frame_mask).values()]
+
+            # Sequence checks are off while watching, as sequences are still incomplete.
+            # Only the most common dimensions of the frames seen so far carry over between
+            # batches, for the dimension check of frames landing later.
+            signature_rows = {}
+            decoded_names = set()
+            sequence_dims = None
+            if watched_dims:
+                sequence_dims = watched_dims.most_common(1)[0][0]
+
+            # Read in, check and report each image as it streams past.
+            # Only thumbnails of images with warnings are kept for the grid.
+            for file_name, im_info in get_images_info(image_files, args.value_thresh,
+                                                      args.size_thresh, args.workers,
+                                                      args.full_decode, cache,
+                                                      metric_options, args.verify_crc,
+                                                      metrics, sequence_dims, checks,
+                                                      args.prefetch_depth,
+                                                      args.prefetch_mb,
+                                                      executor, args.quick_step
+                                                      if args.quick else 0,
+                                                      sequences):
+                metrics.count("frames_analyzed")
+                frame_cnt += 1
+                signature = im_info.pop("signature", None)
+                if signature is not None:
+                    decoded_names.add(file_name)
+                if not args.watch:
+                    signature_rows[file_name] = to_signature_row(
+                        im_info["size"], signature, bool(im_info["warnings"]))
+                if args.watch and "width" in im_info:
+                    watched_dims[(im_info["width"], im_info["height"])] += 1
+                with metrics.stage("report"):
+                    if args.format == "jsonl":
+                        write_record(get_image_record(prefix + file_name, im_info,
+                                                      naming_words), record_stream)
+                    else:
+                        print_image_report(prefix + file_name, im_info)
+                if im_info["warnings"]:
+                    metrics.count("frames_with_warnings")
+                    if im_info["image"] is not None:
+                        with metrics.stage("grid"):
+                            grid_writer.add(im_info["image"])
+                    if not args.report_out:
+                        im_info["image"] = None
+                    warn_images_info[prefix + file_name] = im_info
+                if "exact_value" in im_info:
+                    value_errors.append(im_info["value"] - im_info["exact_value"])
+
+            # Sequences are still incomplete while watching
+            if args.watch:
+                continue
+            with metrics.stage("gaps"):
+                for seq_name, seq_gaps in frame_index.find_gaps(name_filter,
+                                                                frame_mask).items():
+                    gaps[prefix + seq_name] = seq_gaps
+                    gap_pads[prefix + seq_name] = frame_index.get_frame_pad()
+            decoded_cnt += len(decoded_names)
+            if args.quick:
+                decoded_mask = frame_mask & np.isin(frame_index.names, list(decoded_names))
+                for seq_name, seq_ranges in frame_index.find_ranges(decoded_mask).items():
+                    decoded_ranges[prefix + seq_name] = seq_ranges
+                    gap_pads[prefix + seq_name] = frame_index.get_frame_pad()
+
+            with metrics.stage("temporal"):
+                dir_anomalies = find_temporal_anomalies(frame_index, frame_mask,
+                                                        signature_rows, checks, args.quick)
+            for file_name, seq_warnings in dir_anomalies.items():
+                anomalies[prefix + file_name] = seq_warnings
+                if args.format == "jsonl":
+                    write_record({"type": "temporal", "file": prefix + file_name,
+                                  "warnings": seq_warnings}, record_stream)
+
+                im_info = warn_images_info.get(prefix + file_name)
+                if im_info is None:
+                    metrics.count("frames_with_warnings")
+                    # The image was dropped as it had no warnings, so read it again at
+                    # the lowest resolution for its thumbnail
+                    im_info = {"image": None, "size": signature_rows[file_name]["size"],
+                               "warnings": [], "skipped_checks": []}
+                    image = read_image(frame_index.directory / file_name,
+                                       max(DECODE_SCALES))
+                    if image is not None:
+                        im_info["image"] = create_thumbnail(image)
+                        with metrics.stage("grid"):
+                            grid_writer.add(im_info["image"])
+                    if not args.report_out:
+                        im_info["image"] = None
+                    warn_images_info[prefix + file_name] = im_info
+                im_info["warnings"].extend(seq_warnings)
+
+        with metrics.stage("grid"):
+            grid_writer.close()
+
+        if args.format == "jsonl":
+            write_record(get_summary_record(frame_cnt, warn_images_info, gaps, gap_pads,
+                                            value_errors, metrics,
+                                            decoded_ranges if args.quick else None),
+                         record_stream)
+        else:
+            print_temporal_report(anomalies)
+            print_gap_report(gaps, gap_pads)
+            if args.quick:
+                print_sample_report(decoded_cnt, frame_cnt, decoded_ranges, gap_pads)
+            if args.compare_metric and value_errors:
+                print_metric_comparison(value_errors)
+
+        if args.report_out:
+            shard = "/".join(map(str, args.shard)) if args.shard else None
+            write_partial_report(args.report_out, warn_images_info, gaps, gap_pads, shard)
+
+        if args.profile:
+            metrics.print_summary()
+        if args.metrics_out:
+            metrics.save(args.metrics_out)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> (argparse.Namespace, List[str], str):
+    """
+    Parses command line arguments. The filter arguments come from the naming convention,
+    so it is loaded first.
+
+    :param argv: Arguments to parse. Default is sys.argv.
+    :return: Tuple of the arguments, the words of the naming convention and the file
+        extension of frames
+    """
+    naming_parser = argparse.ArgumentParser(add_help=False)
+    naming_parser.add_argument("--naming", help="Path to the naming convention .txt file. "
+                                                f"Default is '{NAMING_CONVENTION_TXT}'",
+                               type=str, default=NAMING_CONVENTION_TXT)
+    naming_words, extension = load_naming_convention(
+        naming_parser.parse_known_args(argv)[0].naming)
 
     parser = argparse.ArgumentParser(
+        prog="brokenFrames.py",
+        parents=[naming_parser],
         description="This tool helps identify broken frames. "
                     "The naming conventions of the frames can be set in 'naming.txt'. "
                     "This can be used to filter out which frames to analyze. "
                     "Ex: With naming convention 'scene_shot_frame.png', you may add the parameter "
                     "'--scene 001' or '--shot 1000-1005")
     parser.add_argument("frames_dir", help="Directory of frames", type=str)
+    parser.add_argument("--recursive", help="Analyze every directory of frames under "
+                                            "frames_dir",
+                        action="store_true")
+    parser.add_argument("--shard", help="Only analyze one slice of the directories of "
+                                        "frames, as 'i/N'. Ex: '--shard 0/4' on the first "
+                                        "of 4 machines",
+                        type=parse_shard)
+    parser.add_argument("--watch", help="Keep watching frames_dir and analyze each frame "
+                                        "as soon as it is written, until Ctrl+C",
+                        action="store_true")
+    parser.add_argument("--watch_idle", help="Stop watching once no frame has been written "
+                                             "for this many seconds",
+                        type=float)
+    parser.add_argument("--report_out", help="Also save the report to a .json file that "
+                                             "can be merged with mergeReports.py",
+                        type=str)
+    parser.add_argument("--format", help="Format of the report. 'jsonl' writes one JSON "
+                                         "record per frame as soon as it is analyzed, "
+                                         "then a summary record. Default is 'text'",
+                        choices=REPORT_FORMATS, default="text")
+    parser.add_argument("--grid_page_size", help="Number of thumbnails per warning image "
+                                                 "grid. Extra thumbnails go to more grid "
+                                                 f"images. Default is '{DEFAULT_PAGE_SIZE}'",
+                        type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--profile", help="Print the time spent in each stage, decode "
+                                          "latency and counters after the report",
+                        action="store_true")
+    parser.add_argument("--metrics_out", help="Save the time spent in each stage, decode "
+                                              "latency and counters to a .json file",
+                        type=str)
+    parser.add_argument("--skip_checks", help="Checks to turn off. Default is to run "
+                                              "every check",
+                        choices=list(CHECKS) + SEQUENCE_CHECKS, nargs="+", default=[])
     parser.add_argument("--value_thresh", help="Threshold of value for dark frames."
                                                "Default is '0.0' (completely black)",
                         type=float, default=0.01)
+    parser.add_argument("--region_grid", help="Rows and columns of regions each frame "
+                                              "is split into for the dark region check. "
+                                              "Default is '4 4'",
+                        type=int, nargs=2, metavar=("ROWS", "COLUMNS"), default=[4, 4])
+    parser.add_argument("--region_thresh", help="Threshold of value for dark regions. "
+                                                "Default is '0.01' (near black)",
+                        type=float, default=0.01)
+    parser.add_argument("--region_diff", help="How far below the mean region value of a "
+                                              "frame a dark region must also be. "
+                                              "Default is '0.1'",
+                        type=float, default=0.1)
     parser.add_argument("--size_thresh", help="Threshold of file size in MB."
                                               "Defaults is '0.2' (0.2MB)",
                         type=float, default=.2)
+    parser.add_argument("--value_metric", help="Metric used for the average value of "
+                                               "frames. 'hsv' and 'max' are exact, 'max' "
+                                               "is faster. 'luma' is fastest but reads "
+                                               "darker. Default is 'hsv'",
+                        choices=VALUE_METRICS, default="hsv")
+    parser.add_argument("--decode_scale", help="Decode frames at 1/n resolution for the "
+                                               "value check. Default is '1' (full)",
+                        type=int, choices=sorted(DECODE_SCALES), default=1)
+    parser.add_argument("--pixel_step", help="Only sample every nth pixel along each axis "
+                                             "for the value check. Default is '1' (all)",
+                        type=int, default=1)
+    parser.add_argument("--compare_metric", help="Also get the exact value of each frame "
+                                                 "and report how far the value metric is "
+                                                 "off from it",
+                        action="store_true")
+    parser.add_argument("--workers", help="Number of worker processes used to read in "
+                                          "and check frames. Default is '1' (serial)",
+                        type=int, default=1)
+    parser.add_argument("--prefetch_depth", help="Number of frames to read ahead on "
+                                                 "background threads while a frame is "
+                                                 "decoded. '0' turns it off. Only used "
+                                                 "with 1 worker. Default is "
+                                                 f"'{DEFAULT_PREFETCH_DEPTH}'",
+                        type=int, default=DEFAULT_PREFETCH_DEPTH)
+    parser.add_argument("--prefetch_mb", help="Size limit of the frames read ahead in MB. "
+                                              f"Default is '{DEFAULT_PREFETCH_MB}'",
+                        type=float, default=DEFAULT_PREFETCH_MB)
+    parser.add_argument("--quick", help="Quick scan of long sequences. Only decode every "
+                                        "nth frame and frames with odd file sizes, then "
+                                        "bisect between them towards the frames with "
+                                        "problems. The report lists the frames decoded",
+                        action="store_true")
+    parser.add_argument("--quick_step", help="Decode every nth frame of each sequence in a "
+                                             f"quick scan. Default is '{DEFAULT_SAMPLE_STEP}'",
+                        type=int, default=DEFAULT_SAMPLE_STEP)
+    parser.add_argument("--full_decode", help="Decode every frame at --decode_scale. By "
+                                              "default frames that already fail a cheap "
+                                              "check are only decoded at the lowest "
+                                              "resolution",
+                        action="store_true")
+    parser.add_argument("--verify_crc", help="Verify the CRC of every PNG chunk in the "
+                                             "truncated/corrupt frame check",
+                        action="store_true")
+    parser.add_argument("--cache", help="Cache results so unchanged frames aren't decoded "
+                                        "again on the next run",
+                        action="store_true")
+    parser.add_argument("--cache_path", help="Path to the cache database. Default is "
+                                             "'~/.cache/brokenFrames/frameCache.sqlite'",
+                        type=str)
+    parser.add_argument("--cache_max_mb", help="Size limit of the cache in MB. Least "
+                                               "recently used frames are evicted past it. "
+                                               f"Default is '{DEFAULT_CACHE_MAX_MB}'",
+                        type=float, default=DEFAULT_CACHE_MAX_MB)
+    parser.add_argument("--invalidate_cache", help="Remove cached results of frames in "
+                                                   "frames_dir and exit",
+                        action="store_true")
     for word in naming_words:
         parser.add_argument(f"--{word}", help=f"Filter the {word} # of the frame. "
                                               f"Ex: '--{word} 001' or  '--{word} 5-10'",
                             type=str)
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.watch and (args.recursive or args.shard):
+        parser.error("--watch only watches frames_dir itself, not with --recursive or "
+                     "--shard")
+    if args.watch and args.quick:
+        parser.error("--quick samples whole sequences, not with --watch")
+    if args.quick_step < 1:
+        parser.error("--quick_step must be at least 1")
+    return args, naming_words, extension
 
-    main()
+
+if __name__ == '__main__':
+    main(*parse_args())
@@ -0,0 +1,124 @@
+"""
+Writes grids of thumbnails (contact sheets) one thumbnail at a time, splitting them into
+pages so any number of thumbnails can be written with bounded memory.
+"""
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+DEFAULT_PAGE_SIZE = 200  # Number of thumbnails per page
+
+
+class ContactSheetWriter:
+    """
+    Fills a preallocated canvas slot by slot and saves it each time a page is full.
+    Every slot is the same size, set by the first thumbnail. Thumbnails with another
+    aspect ratio are shrunk to fit their slot and centered on a white background.
+
+    The first page is saved as file_name, later pages get a page number added.
+    Ex: 'warningImageThumbnails.jpg', 'warningImageThumbnails_2.jpg', ...
+    Pages left by an earlier run are removed when the writer is created, so every page
+    on disk is from this run.
+    """
+
+    def __init__(self, file_name: str = "warningImageThumbnails.jpg", columns: int = 4,
+                 slot_width: int = 100, page_size: int = DEFAULT_PAGE_SIZE):
+        """
+        :param file_name: Name of the first page image to save
+        :param columns: Number of thumbnails per row
+        :param slot_width: Width of each thumbnail
+        :param page_size: Number of thumbnails per page
+        """
+        self.file_name = Path(file_name)
+        self.columns = columns
+        self.slot_width = slot_width
+        self.page_size = max(page_size, 1)
+        self.slot_height = None
+        self.canvas = None
+        self.slot_cnt = 0  # Number of slots filled on the current page
+        self.page_paths = []  # Paths of the saved pages
+        self.remove_old_pages()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def remove_old_pages(self) -> None:
+        """
+        Removes file_name and any numbered pages after it, such as
+        'warningImageThumbnails_2.jpg', left by an earlier run.
+        """
+        old_pages = [self.file_name] + [
+            path for path in self.file_name.parent.glob(
+                f"{self.file_name.stem}_*{self.file_name.suffix}")
+            if path.stem[len(self.file_name.stem) + 1:].isdigit()]
+        for path in old_pages:
+            path.unlink(missing_ok=True)
+
+    def add(self, image: np.ndarray) -> None:
+        """
+        Adds an image to the next slot, saving the page if it is full.
+
+        :param image: Numpy image array. Shrunk down to fit the slot if needed.
+        """
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+        im_height, im_width = image.shape[:2]
+        if self.canvas is None:
+            # Allocate a canvas for a whole page, with slots shaped like the first image
+            self.slot_height = max(1, int(self.slot_width * im_height / im_width))
+            rows = -(-self.page_size // self.columns)
+            self.canvas = np.empty((rows * self.slot_height, self.columns * self.slot_width,
+                                    3), dtype=np.uint8)
+            self.canvas.fill(255)
+
+        # Shrink image down to fit its slot, keeping its aspect ratio
+        scale = min(self.slot_width / im_width, self.slot_height / im_height)
+        new_dims = max(1, round(im_width * scale)), max(1, round(im_height * scale))
+        if new_dims != (im_width, im_height):
+            image = cv2.resize(image, new_dims, interpolation=cv2.INTER_AREA)
+
+        # Copy into the center of the slot
+        row, column = divmod(self.slot_cnt, self.columns)
+        top = row * self.slot_height + (self.slot_height - new_dims[1]) // 2
+        left = column * self.slot_width + (self.slot_width - new_dims[0]) // 2
+        self.canvas[top:top + new_dims[1], left:left + new_dims[0]] = image
+
+        self.slot_cnt += 1
+        if self.slot_cnt == self.page_size:
+            self.save_page()
+
+    def save_page(self) -> None:
+        """
+        Saves the filled rows of the current page and clears the canvas for the next.
+
+        :raises OSError: If the page could not be written
+        """
+        if not self.slot_cnt:
+            return
+
+        page_path = self.file_name
+        if self.page_paths:
+            page_path = self.file_name.with_name(
+                f"{self.file_name.stem}_{len(self.page_paths) + 1}{self.file_name.suffix}")
+        rows = -(-self.slot_cnt // self.columns)
+        if not cv2.imwrite(str(page_path), self.canvas[:rows * self.slot_height]):
+            raise OSError(f"Could not write contact sheet page '{page_path}'")
+        self.page_paths.append(page_path)
+
+        self.canvas.fill(255)
+        self.slot_cnt = 0
+
+    def close(self) -> List[Path]:
+        """
+        Saves the last page.
+
+        :return: Paths of the saved pages
+        """
+        self.save_page()
+        return self.page_paths
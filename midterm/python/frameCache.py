@@ -0,0 +1,166 @@
+"""
+Persistent cache of frame analysis results, so unchanged frames don't need to be decoded
+again when re-scanning the same directories.
+"""
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+DEFAULT_CACHE_MAX_MB = 512
+COMMIT_INTERVAL = 256  # Number of writes between commits
+
+
+def get_default_cache_path() -> Path:
+    """
+    Gets the default location of the cache database in the user cache directory.
+
+    :return: Path to the cache database
+    """
+    cache_dir = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_dir) / "brokenFrames" / "frameCache.sqlite"
+
+
+class FrameCache:
+    """
+    SQLite backed cache of image info. Entries are keyed on the frame's path and the
+    analysis parameters, and are only served if the frame's size and modification time
+    still match. Least recently used entries are evicted once the cache grows past its
+    size limit.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, params: Optional[dict] = None,
+                 max_mb: float = DEFAULT_CACHE_MAX_MB):
+        """
+        :param db_path: Path to the cache database. Created if it doesn't exist.
+        :param params: Analysis parameters the results depend on, such as thresholds
+            and analyzer version. Results made with other parameters are not served.
+        :param max_mb: Size limit of the cached results in megabytes
+        """
+        self.db_path = Path(db_path) if db_path else get_default_cache_path()
+        self.params = json.dumps(params or {}, sort_keys=True)
+        self.max_bytes = int(max_mb * 1048576)
+        self._pending = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS frames (
+                path TEXT NOT NULL,
+                params TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                info TEXT NOT NULL,
+                thumbnail BLOB,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (path, params)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS frames_last_used "
+                          "ON frames (last_used)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, file: Path, stat: os.stat_result) -> Optional[dict]:
+        """
+        Gets the cached image info of a frame.
+
+        :param file: Frame file
+        :param stat: Current stat of the frame file
+        :return: Image info, or None if the frame isn't cached or has changed
+        """
+        key = str(file.resolve())
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, info, thumbnail FROM frames "
+            "WHERE path = ? AND params = ?", (key, self.params)).fetchone()
+        if not row or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+
+        self._write("UPDATE frames SET last_used = ? WHERE path = ? AND params = ?",
+                    (time.time(), key, self.params))
+        im_info = json.loads(row[2])
+        im_info["image"] = None
+        if row[3] is not None:
+            im_info["image"] = cv2.imdecode(np.frombuffer(row[3], np.uint8),
+                                            cv2.IMREAD_COLOR)
+        return im_info
+
+    def put(self, file: Path, stat: os.stat_result, im_info: dict) -> None:
+        """
+        Stores the image info of a frame. The image, if any, should already be a
+        thumbnail.
+
+        :param file: Frame file
+        :param stat: Stat of the frame file taken before it was analyzed
+        :param im_info: Image info of the frame
+        """
+        info = json.dumps({k: v for k, v in im_info.items() if k != "image"})
+        thumbnail = None
+        if im_info.get("image") is not None:
+            thumbnail = cv2.imencode(".png", im_info["image"])[1].tobytes()
+        key = str(file.resolve())
+        entry_bytes = len(key) + len(info) + len(thumbnail or b"")
+        self._write("INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, self.params, stat.st_size, stat.st_mtime_ns, info, thumbnail,
+                     entry_bytes, time.time()))
+
+    def invalidate(self, directory: Optional[str] = None) -> int:
+        """
+        Removes cached results, for all parameters.
+
+        :param directory: Only remove frames under this directory. Removes everything
+            if not given.
+        :return: Number of removed entries
+        """
+        if directory is None:
+            cursor = self.conn.execute("DELETE FROM frames")
+        else:
+            prefix = str(Path(directory).resolve()).rstrip(os.sep) + os.sep
+            cursor = self.conn.execute("DELETE FROM frames WHERE substr(path, 1, ?) = ?",
+                                       (len(prefix), prefix))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache is within its size limit.
+
+        :return: Number of removed entries
+        """
+        cursor = self.conn.execute("""
+            DELETE FROM frames WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(bytes) OVER (ORDER BY last_used DESC, rowid DESC)
+                        AS total
+                    FROM frames)
+                WHERE total > ?)""", (self.max_bytes,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """
+        Commits pending writes, evicts old entries and closes the database.
+        """
+        self.conn.commit()
+        self.evict()
+        self.conn.close()
+
+    def _write(self, sql: str, values: tuple) -> None:
+        """
+        Runs a write statement, committing every few writes rather than every one.
+        """
+        self.conn.execute(sql, values)
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.conn.commit()
+            self._pending = 0
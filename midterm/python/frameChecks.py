@@ -0,0 +1,312 @@
+"""
+Columnar table of frame info and the registry of checks run over it. Each check is a
+vectorized operation over whole columns, so adding a check doesn't add another Python
+loop over every frame.
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pngCheck import PngStructureError, check_png_structure
+
+BYTES_IN_MEGABYTE = 1048576
+CHECK_STAGES = ["metadata", "pixels"]
+REGION_LIST_LIMIT = 4  # Number of dark regions listed in a warning
+
+
+class FrameTable:
+    """
+    Info of a list of frames, one NumPy array per column. Row i is frame names[i].
+    Warnings are bitmasks, with one bit per check in CHECKS.
+    """
+
+    def __init__(self, names: List[str]):
+        """
+        :param names: File names of the frames
+        """
+        frame_cnt = len(names)
+        self.names = names
+        self.size = np.zeros(frame_cnt, dtype=np.float64)  # Megabytes
+        self.width = np.full(frame_cnt, -1, dtype=np.int32)  # -1 if not known
+        self.height = np.full(frame_cnt, -1, dtype=np.int32)
+        self.value = np.full(frame_cnt, np.nan, dtype=np.float64)  # nan if not decoded
+        # Grid of region values of each decoded frame, and their darkest and mean
+        self.regions = [None] * frame_cnt
+        self.region_min = np.full(frame_cnt, np.nan, dtype=np.float64)
+        self.region_mean = np.full(frame_cnt, np.nan, dtype=np.float64)
+        self.corrupt = np.zeros(frame_cnt, dtype=bool)
+        self.errors = [""] * frame_cnt  # What is wrong with each corrupt frame
+        self.warnings = np.zeros(frame_cnt, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_files(cls, files: List[Path], verify_crc: bool = False) -> "FrameTable":
+        """
+        Reads the file size of each frame, and the dimensions and structure of PNG
+        frames, without decoding them.
+
+        :param files: Frame files
+        :param verify_crc: Also verify the CRC of every PNG chunk. This reads each
+            file in full.
+        :return: Table of the frames
+        """
+        table = cls([file.name for file in files])
+        for i, file in enumerate(files):
+            table.size[i] = file.stat().st_size / BYTES_IN_MEGABYTE
+            if file.suffix.lower() != ".png":
+                continue
+            try:
+                table.width[i], table.height[i] = check_png_structure(file, verify_crc)
+            except PngStructureError as err:
+                table.corrupt[i] = True
+                table.errors[i] = str(err)
+        return table
+
+    def set_regions(self, row: int, regions: np.ndarray) -> None:
+        """
+        :param row: Row of the frame
+        :param regions: Average value of each region of the frame, shaped
+            (rows, columns)
+        """
+        self.regions[row] = regions
+        self.region_min[row] = regions.min()
+        self.region_mean[row] = regions.mean()
+
+    def get_sequence_dimensions(self) -> Optional[Tuple[int, int]]:
+        """
+        Gets the most common dimensions of the frames.
+
+        :return: Tuple of width and height, or None if no frame dimensions are known
+        """
+        known = self.width >= 0
+        if not known.any():
+            return None
+        dims, counts = np.unique(np.stack([self.width[known], self.height[known]], axis=1),
+                                 axis=0, return_counts=True)
+        width, height = dims[counts.argmax()]
+        return int(width), int(height)
+
+    def get_warnings(self, row: int, params: dict) -> List[str]:
+        """
+        :param row: Row of the frame
+        :param params: Parameters the checks were run with. See run_checks.
+        :return: Warning of each check the frame failed, in CHECKS order
+        """
+        return [check.message(self, row, params) for check in CHECKS.values()
+                if self.warnings[row] & check.bit]
+
+    def get_image_info(self, row: int, params: dict) -> dict:
+        """
+        Gets the info of a single frame in the image info format of brokenFrames.py.
+        Output dictionary format:
+        {
+            "image": None, as the frame is not decoded
+            "size": size of image in megabytes
+            "width", "height": dimensions of the image, only if known
+            "value": average value of the image, only if known
+            "warnings": list of warnings
+            "skipped_checks": empty list to add names of checks that were not run to
+        }
+
+        :param row: Row of the frame
+        :param params: Parameters the checks were run with. See run_checks.
+        :return: Dictionary containing information of the image
+        """
+        im_info = {"image": None, "size": float(self.size[row])}
+        if self.width[row] >= 0:
+            im_info["width"], im_info["height"] = int(self.width[row]), int(self.height[row])
+        if not np.isnan(self.value[row]):
+            im_info["value"] = float(self.value[row])
+        im_info["warnings"] = self.get_warnings(row, params)
+        im_info["skipped_checks"] = []
+        return im_info
+
+
+class Check:
+    """
+    A check declared in the registry. Use register_check rather than creating these
+    directly.
+    """
+
+    def __init__(self, name: str, label: str, stage: str, bit: int,
+                 run: Callable[[FrameTable, dict], np.ndarray],
+                 message: Callable[[FrameTable, int, dict], str]):
+        """
+        :param name: Name of the check on the command line
+        :param label: Start of the check's warnings, also used in skipped checks
+        :param stage: "metadata" if the check only needs the columns read without
+            decoding, or "pixels" if it needs the "value" column of decoded frames
+        :param bit: Bit of the check in FrameTable.warnings
+        :param run: Function of the table and parameters that returns a boolean mask of
+            the frames that fail the check
+        :param message: Function of the table, row and parameters that returns the
+            warning of a failed frame
+        """
+        self.name = name
+        self.label = label
+        self.stage = stage
+        self.bit = bit
+        self.run = run
+        self.message = message
+
+
+CHECKS: Dict[str, Check] = {}  # Check name to check, in the order warnings are listed
+
+
+def register_check(name: str, label: str, stage: str,
+                   message: Callable[[FrameTable, int, dict], str]) -> Callable:
+    """
+    Decorator that adds a check to CHECKS. See Check.
+
+    :param name: Name of the check on the command line
+    :param label: Start of the check's warnings
+    :param stage: One of CHECK_STAGES
+    :param message: Function that returns the warning of a failed frame
+    :return: Decorator of the check's run function
+    """
+    if stage not in CHECK_STAGES:
+        raise ValueError(f"Invalid check stage: {stage}")
+
+    def decorator(run):
+        CHECKS[name] = Check(name, label, stage, 1 << len(CHECKS), run, message)
+        return run
+    return decorator
+
+
+def get_checks(stage: Optional[str] = None,
+               enabled: Optional[Iterable[str]] = None) -> List[Check]:
+    """
+    :param stage: Only get checks of this stage. Default is every stage.
+    :param enabled: Names of the checks that are turned on. Default is all.
+    :return: List of checks, in CHECKS order
+    """
+    enabled = set(CHECKS if enabled is None else enabled)
+    return [check for check in CHECKS.values()
+            if check.name in enabled and (stage is None or check.stage == stage)]
+
+
+def find_bad_regions(regions: np.ndarray, region_thresh: float,
+                     region_diff: float) -> np.ndarray:
+    """
+    A region is only bad when it is near blank and the frame as a whole is lit, so
+    ordinary contrast, such as a bright sky over dark ground, or the black corners of a
+    dark, vignetted scene, aren't flagged.
+
+    :param regions: Average value of each region of a frame, shaped (rows, columns)
+    :param region_thresh: Float from 0-1 threshold for region value
+    :param region_diff: How far below the mean region value a region must also be
+    :return: Boolean mask of regions at or below region_thresh and at least region_diff
+        below the mean region
+    """
+    return (regions <= region_thresh) & (regions <= regions.mean() - region_diff)
+
+
+def get_bad_region_boxes(table: FrameTable, row: int,
+                         params: dict) -> List[Tuple[int, int, int, int, float]]:
+    """
+    :param table: Table of the frames
+    :param row: Row of the frame
+    :param params: Parameters the checks were run with. See run_checks.
+    :return: List of the x0, y0, x1, y1 pixel bounds and value of each bad region of
+        the frame, in full resolution pixels
+    """
+    regions = table.regions[row]
+    rows, cols = regions.shape
+    width, height = int(table.width[row]), int(table.height[row])
+    bad = find_bad_regions(regions, params["region_thresh"], params["region_diff"])
+    return [(col * width // cols, row_i * height // rows,
+             (col + 1) * width // cols, (row_i + 1) * height // rows,
+             float(regions[row_i, col]))
+            for row_i, col in np.argwhere(bad).tolist()]
+
+
+def format_region_warning(table: FrameTable, row: int, params: dict) -> str:
+    """
+    :return: Warning listing the bad regions of a frame. See get_bad_region_boxes.
+    """
+    boxes = get_bad_region_boxes(table, row, params)
+    listed = [f"({x0}, {y0})-({x1}, {y1}) at {value * 100:.2f}%"
+              for x0, y0, x1, y1, value in boxes[:REGION_LIST_LIMIT]]
+    if len(boxes) > REGION_LIST_LIMIT:
+        listed.append(f"{len(boxes) - REGION_LIST_LIMIT} more")
+    return f"Dark region - {len(boxes)} of {table.regions[row].size} regions: " \
+           f"{', '.join(listed)}"
+
+
+def run_checks(table: FrameTable, checks: List[Check], params: dict) -> None:
+    """
+    Runs each check over the table and sets the warning bits of failed frames.
+
+    :param table: Table of the frames
+    :param checks: Checks to run. See get_checks.
+    :param params: Parameters of the checks. Keys:
+        "size_thresh" - Threshold for image size in megabytes
+        "value_thresh" - Float from 0-1 threshold for image value
+        "region_thresh" - Float from 0-1 threshold for region value
+        "region_diff" - How far below the mean region value a dark region must be
+        "sequence_dims" - Tuple of width and height of the sequence, or None
+    """
+    for check in checks:
+        table.warnings[check.run(table, params)] |= check.bit
+
+
+@register_check("small", "Small image", "metadata",
+                lambda table, row, params:
+                f"Small image - Image size is {table.size[row]:.6f} megabytes")
+def find_small_images(table: FrameTable, params: dict) -> np.ndarray:
+    """
+    Frames with a file size at or below the "size_thresh" parameter.
+    """
+    return table.size <= params["size_thresh"]
+
+
+@register_check("corrupt", "Corrupt image", "metadata",
+                lambda table, row, params: f"Corrupt image - {table.errors[row]}")
+def find_corrupt_images(table: FrameTable, params: dict) -> np.ndarray:
+    """
+    Frames that were not completely written, or could not be decoded.
+    """
+    return table.corrupt
+
+
+@register_check("mismatch", "Mismatched dimensions", "metadata",
+                lambda table, row, params:
+                f"Mismatched dimensions - Image is {table.width[row]}x{table.height[row]}, "
+                f"sequence is {params['sequence_dims'][0]}x{params['sequence_dims'][1]}")
+def find_mismatched_images(table: FrameTable, params: dict) -> np.ndarray:
+    """
+    Frames with dimensions that differ from the "sequence_dims" parameter. Frames
+    without known dimensions are skipped.
+    """
+    sequence_dims = params.get("sequence_dims")
+    if sequence_dims is None:
+        return np.zeros(len(table), dtype=bool)
+    return (table.width >= 0) & ((table.width != sequence_dims[0]) |
+                                 (table.height != sequence_dims[1]))
+
+
+@register_check("dark", "Dark image", "pixels",
+                lambda table, row, params:
+                f"Dark image - Average value of {table.value[row] * 100:.2f}%")
+def find_black_images(table: FrameTable, params: dict) -> np.ndarray:
+    """
+    Frames with an average value at or below the "value_thresh" parameter. 0.0 is a
+    black image, 0.5 is a 50% grey image, and 1.0 is a white image.
+    """
+    return table.value <= params["value_thresh"]
+
+
+@register_check("region", "Dark region", "pixels", format_region_warning)
+def find_dark_regions(table: FrameTable, params: dict) -> np.ndarray:
+    """
+    Frames with a region at or below the "region_thresh" parameter that is also at
+    least the "region_diff" parameter below the mean region value. Ex: A bucket render
+    with black tiles, or a frame with half of it missing. Frames that are dark as a
+    whole are left to the dark check. See find_bad_regions.
+    """
+    return (table.value > params["value_thresh"]) & \
+        (table.region_min <= params["region_thresh"]) & \
+        (table.region_min <= table.region_mean - params["region_diff"])
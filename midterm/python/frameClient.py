@@ -0,0 +1,89 @@
+"""
+Thin client of frameServer.py. Takes the same arguments as brokenFrames.py and sends
+them to the analyzer daemon, which is already warm, then prints its report as it
+streams back. If no daemon is running, the scan runs in this process instead.
+Only imports the standard library unless it has to fall back, so it starts quickly.
+"""
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+SOCKET_ENV = "BROKEN_FRAMES_SOCKET"  # Environment variable to set the socket path with
+
+
+def get_default_socket_path() -> Path:
+    """
+    Gets the socket path of the daemon. Set with the BROKEN_FRAMES_SOCKET environment
+    variable, otherwise it is in the user runtime directory.
+
+    :return: Path to the Unix domain socket
+    """
+    if os.getenv(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or Path.home() / ".cache"
+    return Path(runtime_dir) / "brokenFrames" / "brokenFrames.sock"
+
+
+def run_remote(argv: List[str], socket_path: Path) -> int:
+    """
+    Sends a scan to the daemon and writes its output to stdout and stderr as it arrives.
+
+    Request format, one line of JSON:
+    {"argv": brokenFrames.py arguments, "cwd": directory relative paths are from}
+    Response format, one line of JSON per message:
+    {"stream": "stdout" or "stderr", "text": output text}, then {"exit": exit code}
+
+    :param argv: brokenFrames.py arguments
+    :param socket_path: Path to the daemon's socket
+    :return: Exit code of the scan
+    :raises OSError: If no daemon is listening on the socket
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        request = {"argv": argv, "cwd": os.getcwd()}
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+
+        with sock.makefile("r", encoding="utf-8") as responses:
+            for line in responses:
+                message = json.loads(line)
+                if "exit" in message:
+                    return message["exit"]
+                stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+                stream.write(message["text"])
+                stream.flush()
+    print("Analyzer daemon closed the connection", file=sys.stderr)
+    return 1
+
+
+def run_local(argv: List[str]) -> int:
+    """
+    Runs the scan in this process, the same as brokenFrames.py.
+
+    :param argv: brokenFrames.py arguments
+    :return: Exit code of the scan
+    """
+    from brokenFrames import main, parse_args
+    main(*parse_args(argv))
+    return 0
+
+
+def run(argv: List[str], socket_path: Optional[Path] = None) -> int:
+    """
+    Runs a scan on the daemon, or in this process if no daemon is running.
+
+    :param argv: brokenFrames.py arguments
+    :param socket_path: Path to the daemon's socket. Default is
+        get_default_socket_path.
+    :return: Exit code of the scan
+    """
+    try:
+        return run_remote(argv, socket_path or get_default_socket_path())
+    except (FileNotFoundError, ConnectionRefusedError):
+        return run_local(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(run(sys.argv[1:]))
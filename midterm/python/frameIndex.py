@@ -0,0 +1,302 @@
+"""
+Index of the frames in a directory with their file names parsed once against the naming
+convention, for fast filtering and missing frame detection.
+"""
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+FRAME_WORD = "frame"  # Name word holding the frame number
+
+
+class FrameIndex:
+    """
+    Frames in a directory that match the naming convention. Each name word is parsed into
+    an integer column once, so filtering and gap detection are array operations rather
+    than per file string parsing.
+    """
+
+    def __init__(self, directory: str, name_words: List[str], names: List[str],
+                 words: List[List[str]]):
+        """
+        :param directory: Directory of frames
+        :param name_words: Words of the naming convention
+        :param names: File names of the frames, in directory order
+        :param words: Name words of each frame
+        """
+        self.directory = Path(directory)
+        self.name_words = name_words
+        self.names = names
+
+        # Parse each word column once. Words that aren't integers are masked out.
+        self.words = np.array(words, dtype=str).reshape(len(names), len(name_words))
+        self.is_number = np.char.isdigit(self.words)
+        self.numbers = np.where(self.is_number, self.words, "0").astype(np.int64)
+
+    @classmethod
+    def from_directory(cls, directory: str, name_words: List[str], ext: str,
+                       report_invalid: bool = True) -> "FrameIndex":
+        """
+        Builds the index from a single pass over the directory.
+
+        :param directory: Directory of frames
+        :param name_words: Words of the naming convention
+        :param ext: File extension of frames
+        :param report_invalid: Output files with the extension that don't match the
+            naming convention
+        :return: Index of the frames
+        """
+        suffix = f".{ext}"
+        with os.scandir(directory) as entries:
+            # Filter file extensions and skip over directories
+            names = [entry.name for entry in entries
+                     if entry.name.endswith(suffix) and entry.is_file()]
+        return cls.from_names(directory, name_words, ext, names, report_invalid)
+
+    @classmethod
+    def from_names(cls, directory: str, name_words: List[str], ext: str,
+                   names: List[str], report_invalid: bool = True) -> "FrameIndex":
+        """
+        Builds the index from file names already known to have the extension.
+
+        :param directory: Directory of frames
+        :param name_words: Words of the naming convention
+        :param ext: File extension of frames
+        :param names: File names of the frames
+        :param report_invalid: Output files that don't match the naming convention
+        :return: Index of the frames
+        """
+        suffix = f".{ext}"
+        valid_names, words = [], []
+        for name in names:
+            # Ensure number of file name words is expected
+            frame_words = name[:-len(suffix)].split("_")
+            if len(frame_words) != len(name_words):
+                if report_invalid:
+                    print(f"Invalid named file found. "
+                          f"Incorrect number of words: {name}")
+                continue
+
+            valid_names.append(name)
+            words.append(frame_words)
+        return cls(directory, name_words, valid_names, words)
+
+    def __len__(self):
+        return len(self.names)
+
+    def filter(self, name_filter: dict) -> np.ndarray:
+        """
+        Finds the frames with names in the filter ranges.
+
+        :param name_filter: Dict containing min and max ranges for each name word.
+            See get_filter_ranges.
+        :return: Boolean mask of frames in range
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for pos, values in name_filter.items():
+            # Make sure there is a filter for that word
+            num_range = values["range"]
+            if not num_range:
+                continue
+
+            # Ensure word is integer
+            for i in np.flatnonzero(mask & ~self.is_number[:, pos]):
+                print(f"Invalid named file found. "
+                      f"Non-integer found: {self.words[i][pos]} in {self.names[i]}")
+            mask &= self.is_number[:, pos]
+
+            # Check if out of range
+            column = self.numbers[:, pos]
+            mask &= (column >= num_range["min"]) & (column <= num_range["max"])
+        return mask
+
+    def files(self, mask: np.ndarray) -> List[Path]:
+        """
+        :param mask: Boolean mask of frames, from filter
+        :return: Paths of the frames in the mask, in directory order
+        """
+        return [self.directory / self.names[i] for i in np.flatnonzero(mask)]
+
+    def find_gaps(self, name_filter: dict,
+                  mask: np.ndarray) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Finds missing frame numbers in each sequence. A sequence is the frames that share
+        every name word other than the frame word. Gaps are searched for in the frame
+        filter range if there is one, otherwise between the first and last frame of the
+        sequence.
+
+        :param name_filter: Dict containing min and max ranges for each name word.
+            See get_filter_ranges.
+        :param mask: Boolean mask of frames to search, from filter
+        :return: Dictionary of each sequence name, without its frame word, to a list of
+            inclusive (start, end) ranges of missing frames. Sequences without gaps are
+            left out.
+        """
+        frame_pos = self.get_frame_position()
+        frame_range = name_filter[frame_pos]["range"] if frame_pos in name_filter else None
+
+        gaps = {}
+        for seq_name, indices in self.group_sequences(mask).items():
+            seq_frames = self.numbers[indices, frame_pos]
+            first, last = seq_frames[0], seq_frames[-1]
+            if frame_range:
+                first, last = frame_range["min"], frame_range["max"]
+            seq_gaps = find_number_gaps(seq_frames, first, last)
+            if seq_gaps:
+                gaps[seq_name] = seq_gaps
+        return gaps
+
+    def group_sequences(self, mask: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Groups frames into sequences. A sequence is the frames that share every name word
+        other than the frame word.
+
+        :param mask: Boolean mask of frames to group, from filter. Frames without an
+            integer frame word are left out.
+        :return: Dictionary of each sequence name, without its frame word, to the
+            indices of its frames sorted by frame number
+        """
+        frame_pos = self.get_frame_position()
+        indices = np.flatnonzero(mask & self.is_number[:, frame_pos])
+        if not len(indices):
+            return {}
+
+        # Group frames by the rest of their name words, then sort by frame in each group
+        seq_positions = [pos for pos in range(len(self.name_words)) if pos != frame_pos]
+        group_ids = np.zeros(len(indices), dtype=np.int64)
+        for pos in seq_positions:
+            # Integer columns are much faster to group by than string columns
+            column = self.numbers[indices, pos] if self.is_number[indices, pos].all() \
+                else self.words[indices, pos]
+            _, word_ids = np.unique(column, return_inverse=True)
+            group_ids = group_ids * (word_ids.max() + 1) + word_ids
+        frames = self.numbers[indices, frame_pos]
+        order = np.lexsort((frames, group_ids))
+        group_starts = np.flatnonzero(np.diff(group_ids[order])) + 1
+
+        return {"_".join(self.words[indices[group[0]], seq_positions]): indices[group]
+                for group in np.split(order, group_starts)}
+
+    def find_ranges(self, mask: np.ndarray) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Finds the ranges of frame numbers of the frames in each sequence.
+
+        :param mask: Boolean mask of frames, from filter
+        :return: Dictionary of each sequence name, without its frame word, to a list of
+            inclusive (start, end) ranges of its frames in the mask
+        """
+        frame_pos = self.get_frame_position()
+        return {seq_name: find_number_ranges(self.numbers[indices, frame_pos])
+                for seq_name, indices in self.group_sequences(mask).items()}
+
+    def get_frame_pad(self) -> int:
+        """
+        :return: Number of digits frame numbers are zero padded to in file names
+        """
+        if not len(self):
+            return 0
+        return len(self.words[0, self.get_frame_position()])
+
+    def get_frame_position(self) -> int:
+        """
+        :return: Position of the frame word in file names. The last word if the naming
+            convention has no frame word.
+        """
+        if FRAME_WORD in self.name_words:
+            return self.name_words.index(FRAME_WORD)
+        return len(self.name_words) - 1
+
+
+def find_frame_directories(root: str, name_words: List[str],
+                           ext: str) -> List[FrameIndex]:
+    """
+    Finds every directory under root, including root, that holds frames matching the
+    naming convention.
+
+    :param root: Directory to search
+    :param name_words: Words of the naming convention
+    :param ext: File extension of frames
+    :return: Index of the frames of each directory, sorted by directory path
+    """
+    frame_indices = []
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        frame_index = FrameIndex.from_directory(directory, name_words, ext,
+                                                report_invalid=False)
+        if len(frame_index):
+            frame_indices.append(frame_index)
+        with os.scandir(directory) as entries:
+            directories.extend(entry.path for entry in entries
+                               if entry.is_dir(follow_symlinks=False))
+    return sorted(frame_indices, key=lambda frame_index: str(frame_index.directory))
+
+
+def get_shard(frame_indices: List[FrameIndex], shard: int,
+              shard_cnt: int) -> List[FrameIndex]:
+    """
+    Splits directories of frames into shard_cnt disjoint shards of roughly equal frame
+    counts and returns one of them. Directories are kept whole so sequence wide checks
+    still see every frame. The split only depends on the directory paths and frame
+    counts, so every machine computes the same shards.
+
+    :param frame_indices: Index of the frames of each directory
+    :param shard: Number of the shard to return, from 0 to shard_cnt - 1
+    :param shard_cnt: Number of shards
+    :return: Index of the frames of each directory in the shard, in the same order
+    """
+    # Give the largest directories out first, each to the least loaded shard
+    loads = [0] * shard_cnt
+    shard_of = {}
+    for frame_index in sorted(frame_indices,
+                              key=lambda index: (-len(index), str(index.directory))):
+        least_loaded = loads.index(min(loads))
+        shard_of[str(frame_index.directory)] = least_loaded
+        loads[least_loaded] += len(frame_index)
+    return [frame_index for frame_index in frame_indices
+            if shard_of[str(frame_index.directory)] == shard]
+
+
+def find_number_gaps(numbers: np.ndarray, first: int, last: int) -> List[Tuple[int, int]]:
+    """
+    Finds ranges of numbers between first and last that are missing from numbers.
+
+    :param numbers: Sorted numbers
+    :param first: First number expected
+    :param last: Last number expected
+    :return: List of inclusive (start, end) ranges of missing numbers
+    """
+    # Pad with the numbers just outside the expected range so gaps at the ends are found
+    numbers = numbers[(numbers >= first) & (numbers <= last)]
+    bounds = np.concatenate(([first - 1], numbers, [last + 1]))
+    gap_ends = np.flatnonzero(np.diff(bounds) > 1)
+    return [(int(bounds[i] + 1), int(bounds[i + 1] - 1)) for i in gap_ends]
+
+
+def find_number_ranges(numbers: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Finds runs of consecutive numbers.
+
+    :param numbers: Sorted numbers
+    :return: List of inclusive (start, end) ranges of the numbers
+    """
+    if not len(numbers):
+        return []
+    run_ends = np.flatnonzero(np.diff(numbers) > 1)
+    starts = np.r_[numbers[0], numbers[run_ends + 1]]
+    ends = np.r_[numbers[run_ends], numbers[-1]]
+    return [(int(start), int(end)) for start, end in zip(starts, ends)]
+
+
+def format_ranges(ranges: List[Tuple[int, int]], pad: int = 0) -> str:
+    """
+    Formats ranges of numbers. Ex: [(1002, 1002), (1004, 1010)] -> '1002, 1004-1010'
+
+    :param ranges: List of inclusive (start, end) ranges
+    :param pad: Number of digits to zero pad numbers to
+    :return: Comma separated ranges
+    """
+    return ", ".join(f"{start:0{pad}d}" if start == end else f"{start:0{pad}d}-{end:0{pad}d}"
+                     for start, end in ranges)
@@ -0,0 +1,149 @@
+"""
+Timing and counters of each stage of a brokenFrames.py run, to find which stage is the
+bottleneck and track throughput across runs.
+"""
+import bisect
+import json
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the latency histogram buckets in seconds. The last bucket is unbounded.
+HISTOGRAM_BOUNDS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0]
+
+
+class Histogram:
+    """
+    Counts of values in fixed, roughly logarithmic buckets.
+    """
+
+    def __init__(self, bounds: list = None):
+        """
+        :param bounds: Upper bounds of each bucket. Default is HISTOGRAM_BOUNDS.
+        """
+        self.bounds = bounds or HISTOGRAM_BOUNDS
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        :param value: Value to add
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        """
+        :return: Dictionary of the bucket bounds, counts and summary statistics
+        """
+        return {
+            "bounds": self.bounds,
+            "counts": self.counts,
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max
+        }
+
+
+class Metrics:
+    """
+    Wall and CPU time of each stage, counters and histograms of a run.
+    CPU time only counts this process. Work done in worker processes is counted in the
+    "worker_cpu_seconds" counter instead.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.histograms = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the code in the with block and adds it to the stage. A stage can be
+        entered any number of times, such as once per frame.
+
+        :param name: Name of the stage
+        """
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0,
+                                                  "calls": 0})
+            stage["wall_seconds"] += time.perf_counter() - wall_start
+            stage["cpu_seconds"] += time.process_time() - cpu_start
+            stage["calls"] += 1
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        :param name: Name of the counter
+        :param value: Amount to add to the counter
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        :param name: Name of the histogram
+        :param value: Value to add to the histogram
+        """
+        self.histograms.setdefault(name, Histogram()).observe(value)
+
+    def to_dict(self) -> dict:
+        """
+        :return: Dictionary of every stage, counter and histogram, plus the total wall
+            time and frames analyzed per second
+        """
+        total_seconds = time.perf_counter() - self.start
+        frames = self.counters.get("frames_analyzed", 0)
+        return {
+            "total_seconds": total_seconds,
+            "frames_per_second": frames / total_seconds if total_seconds else 0.0,
+            "stages": self.stages,
+            "counters": self.counters,
+            "histograms": {name: histogram.to_dict()
+                           for name, histogram in self.histograms.items()}
+        }
+
+    def save(self, file_path: str) -> None:
+        """
+        Saves the metrics to a .json file.
+
+        :param file_path: Path of the .json file
+        """
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    def print_summary(self) -> None:
+        """
+        Outputs the time of each stage, the counters and histograms to command line.
+        """
+        metrics = self.to_dict()
+        total_seconds = metrics["total_seconds"]
+        print(f"Profile - {total_seconds:.3f}s total, "
+              f"{metrics['frames_per_second']:.1f} frames/sec")
+
+        print(f"\t{'Stage':<12}{'Wall (s)':>10}{'CPU (s)':>10}{'% Wall':>8}{'Calls':>8}")
+        for name, stage in metrics["stages"].items():
+            share = stage["wall_seconds"] / total_seconds * 100 if total_seconds else 0
+            print(f"\t{name:<12}{stage['wall_seconds']:>10.3f}{stage['cpu_seconds']:>10.3f}"
+                  f"{share:>8.1f}{stage['calls']:>8}")
+
+        for name, value in metrics["counters"].items():
+            value = f"{value:.3f}" if isinstance(value, float) else value
+            print(f"\t{name} - {value}")
+
+        for name, histogram in metrics["histograms"].items():
+            print(f"\t{name} - mean {histogram['mean'] * 1000:.1f}ms, "
+                  f"max {histogram['max'] * 1000:.1f}ms")
+            lower = 0.0
+            for bound, count in zip(histogram["bounds"] + [float("inf")],
+                                    histogram["counts"]):
+                if count:
+                    print(f"\t\t{lower * 1000:g}-{bound * 1000:g}ms - {count}")
+                lower = bound
@@ -0,0 +1,56 @@
+"""
+Reads the bytes of upcoming frames on background threads, so reading frames from
+network storage overlaps with decoding them.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_PREFETCH_DEPTH = 4  # Number of frames read ahead of the frame being decoded
+DEFAULT_PREFETCH_MB = 256  # Size limit of the frames read ahead
+
+
+def read_file_bytes(file: Path) -> Optional[bytes]:
+    """
+    :param file: File to read
+    :return: Contents of the file, or None if it could not be read
+    """
+    try:
+        return file.read_bytes()
+    except OSError:
+        return None
+
+
+def prefetch_files(files: List[Path], sizes_mb: List[float],
+                   depth: int = DEFAULT_PREFETCH_DEPTH, max_mb: float = DEFAULT_PREFETCH_MB
+                   ) -> Iterator[Tuple[Path, Optional[bytes]]]:
+    """
+    Reads files ahead on a pool of threads and yields their contents in order. Reads
+    block on I/O without holding the GIL, so they run while the caller decodes.
+
+    At most depth files, and max_mb megabytes, are read ahead at a time. A single file
+    larger than max_mb is still read, on its own.
+
+    :param files: Files to read, in the order they are needed
+    :param sizes_mb: Size of each file in megabytes, to keep within max_mb
+    :param depth: Number of files to read ahead. Also the number of threads.
+    :param max_mb: Size limit of the files read ahead
+    :return: Iterator of tuples of each file and its contents, or None if it could not
+        be read
+    """
+    queue = deque(zip(files, sizes_mb))
+    with ThreadPoolExecutor(max_workers=max(depth, 1)) as executor:
+        reads = deque()
+        read_mb = 0
+        while queue or reads:
+            # Start reads until the depth or size limit is reached
+            while queue and len(reads) < depth and \
+                    (not reads or read_mb + queue[0][1] <= max_mb):
+                file, size_mb = queue.popleft()
+                reads.append((file, size_mb, executor.submit(read_file_bytes, file)))
+                read_mb += size_mb
+
+            file, size_mb, read = reads.popleft()
+            read_mb -= size_mb
+            yield file, read.result()
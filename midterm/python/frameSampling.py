@@ -0,0 +1,108 @@
+"""
+Picks which frames of a long sequence to decode in a quick scan. A sample of the frames
+is decoded first, then each interval between checked frames that has a warning at
+either end, or whose ends look very different, is bisected until the exact frames where
+the problem starts and ends are found. The number of frames decoded grows with the
+number of problems rather than the length of the sequence.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from frameSignatures import find_size_drops
+
+DEFAULT_SAMPLE_STEP = 24  # Decode every nth frame, one frame a second at 24 fps
+SIZE_OUTLIER = 0.25  # Fraction a frame's size can differ from its neighbours unsampled
+SAMPLE_DIFF = 0.2  # Histogram difference between checked frames that is bisected
+
+
+def get_sample_positions(sizes: np.ndarray, step: int = DEFAULT_SAMPLE_STEP) -> np.ndarray:
+    """
+    Gets the frames of a sequence to decode first: every nth frame, the last frame and
+    every frame with a file size far off from the frames around it.
+
+    :param sizes: Size of each frame of the sequence, in frame order
+    :param step: Decode every nth frame
+    :return: Sorted positions of the frames in the sequence
+    """
+    frame_cnt = len(sizes)
+    if frame_cnt < 2:
+        return np.arange(frame_cnt)
+    outliers = np.flatnonzero(np.abs(find_size_drops(sizes)) >= SIZE_OUTLIER)
+    return np.union1d(np.r_[np.arange(0, frame_cnt, max(step, 1)), frame_cnt - 1],
+                      outliers)
+
+
+class SequenceSampler:
+    """
+    Tracks the checked frames of one sequence and picks the next frames to decode.
+    """
+
+    def __init__(self, sizes: np.ndarray, step: int = DEFAULT_SAMPLE_STEP):
+        """
+        :param sizes: Size of each frame of the sequence, in frame order
+        :param step: Decode every nth frame first. See get_sample_positions.
+        """
+        self.sizes = sizes
+        self.step = step
+        # Position of each checked frame to whether it warns and its brightness
+        # histogram, or None if it wasn't decoded
+        self.warns: Dict[int, bool] = {}
+        self.histograms: Dict[int, Optional[np.ndarray]] = {}
+
+    def add(self, position: int, warns: bool, signature: Optional[dict] = None) -> None:
+        """
+        Records a checked frame.
+
+        :param position: Position of the frame in the sequence
+        :param warns: Whether the frame has any warning
+        :param signature: Signature of the frame, see get_frame_signature, or None if it
+            wasn't decoded
+        """
+        self.warns[position] = warns
+        self.histograms[position] = None if signature is None \
+            else np.array(signature["histogram"])
+
+    def is_checked(self, position: int) -> bool:
+        """
+        :param position: Position of the frame in the sequence
+        :return: Whether the frame was already checked
+        """
+        return position in self.warns
+
+    def first_positions(self) -> List[int]:
+        """
+        :return: Positions of the frames to check first, that aren't checked yet
+        """
+        return [int(position) for position in get_sample_positions(self.sizes, self.step)
+                if not self.is_checked(position)]
+
+    def next_positions(self) -> List[int]:
+        """
+        Picks the middle frame of each interval between neighbouring checked frames that
+        needs bisecting. Frames are decoded in rounds, so each round can be decoded in
+        parallel.
+
+        :return: Positions of the frames to check next. Empty once no interval needs
+            bisecting.
+        """
+        checked = sorted(self.warns)
+        positions = []
+        for start, end in zip(checked[:-1], checked[1:]):
+            if end - start > 1 and self.differs(start, end):
+                positions.append((start + end) // 2)
+        return positions
+
+    def differs(self, start: int, end: int) -> bool:
+        """
+        :param start: Position of a checked frame
+        :param end: Position of another checked frame
+        :return: Whether either frame warns, or their brightness histograms differ by at
+            least SAMPLE_DIFF
+        """
+        if self.warns[start] or self.warns[end]:
+            return True
+        start_histogram, end_histogram = self.histograms[start], self.histograms[end]
+        if start_histogram is None or end_histogram is None:
+            return False
+        return np.abs(start_histogram - end_histogram).sum() / 2 >= SAMPLE_DIFF
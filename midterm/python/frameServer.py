@@ -0,0 +1,163 @@
+"""
+Long running analyzer daemon. Keeps cv2, numpy and a pool of worker processes warm, and
+runs brokenFrames.py scans sent over a Unix domain socket by frameClient.py, streaming
+back the same report the command line would print.
+"""
+import argparse
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import List, Optional
+
+from brokenFrames import main, parse_args
+from frameClient import get_default_socket_path
+
+
+class SocketStream(io.TextIOBase):
+    """
+    Text stream that sends everything written to it to the client, tagged with the
+    name of the stream. See run_remote for the message format.
+    """
+
+    def __init__(self, wfile, name: str):
+        """
+        :param wfile: Binary file of the client connection
+        :param name: Name of the stream, "stdout" or "stderr"
+        """
+        super().__init__()
+        self.wfile = wfile
+        self.name = name
+
+    def write(self, text: str) -> int:
+        if text:
+            message = {"stream": self.name, "text": text}
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+        return len(text)
+
+    def flush(self) -> None:
+        self.wfile.flush()
+
+
+class ScanHandler(socketserver.StreamRequestHandler):
+    """
+    Runs one scan per connection. Scans run one at a time, from the directory the
+    client was run in.
+    """
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        stdout = SocketStream(self.wfile, "stdout")
+        stderr = SocketStream(self.wfile, "stderr")
+        server_cwd = os.getcwd()
+        try:
+            os.chdir(request["cwd"])
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exit_code = run_scan(request["argv"], self.server.executor)
+            self.wfile.write((json.dumps({"exit": exit_code}) + "\n").encode("utf-8"))
+        except OSError:
+            # Client disconnected, such as with Ctrl+C
+            pass
+        finally:
+            os.chdir(server_cwd)
+
+
+def run_scan(argv: List[str], executor: Optional[ProcessPoolExecutor] = None) -> int:
+    """
+    Runs a brokenFrames.py scan in this process.
+
+    :param argv: brokenFrames.py arguments
+    :param executor: Warm pool of worker processes
+    :return: Exit code of the scan
+    """
+    try:
+        args, naming_words, extension = parse_args(argv)
+        if args.watch:
+            print("--watch runs until Ctrl+C, so run it with brokenFrames.py instead",
+                  file=sys.stderr)
+            return 2
+        # Worker processes don't run from the client's directory
+        args.frames_dir = os.path.abspath(args.frames_dir)
+        main(args, naming_words, extension, executor)
+    except SystemExit as err:
+        # From argparse, such as for '--help' or invalid arguments
+        if err.code is None or isinstance(err.code, int):
+            return err.code or 0
+        print(err.code, file=sys.stderr)
+        return 1
+    except Exception:
+        # Report the error to the client and keep serving
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+class AnalyzerServer(socketserver.UnixStreamServer):
+    """
+    Unix domain socket server holding the warm worker pool.
+    """
+
+    def __init__(self, socket_path: Path, workers: int):
+        """
+        :param socket_path: Path of the socket to listen on
+        :param workers: Number of worker processes to keep warm. 1 runs scans serially.
+        :raises OSError: If another daemon is already listening on the socket
+        """
+        self.socket_path = Path(socket_path)
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            # Remove the socket of a daemon that didn't shut down cleanly
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                if sock.connect_ex(str(self.socket_path)) == 0:
+                    raise OSError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+
+        self.executor = None
+        if workers > 1:
+            # Start every worker now, so the first scan doesn't wait for them
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            list(self.executor.map(abs, range(workers)))
+        super().__init__(str(self.socket_path), ScanHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def shut_down(*_) -> None:
+    """
+    Exits on SIGTERM, cleaning up the same as Ctrl+C.
+    """
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This tool runs brokenFrames.py as a daemon with a warm pool of "
+                    "worker processes. Run scans with frameClient.py, which takes the same "
+                    "arguments as brokenFrames.py.")
+    parser.add_argument("--socket", help="Path of the Unix domain socket. Default is "
+                                         f"'{get_default_socket_path()}'",
+                        type=Path, default=get_default_socket_path())
+    parser.add_argument("--workers", help="Number of worker processes to keep warm. Scans "
+                                          "with '--workers' above 1 use them. Default is "
+                                          f"'{os.cpu_count()}'",
+                        type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, shut_down)
+    with AnalyzerServer(args.socket, args.workers) as server:
+        print(f"Listening on {args.socket}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,186 @@
+"""
+Compact signatures of frames, compared across a sequence to find frames that only look
+wrong next to their neighbours, such as flicker frames, duplicated frames and sudden
+drops in file size.
+"""
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+SAMPLE_SIZE = 32  # Frames are shrunk to this width and height before anything else
+SIGNATURE_SIZE = 8  # Width and height of the luma thumbnail
+HISTOGRAM_BINS = 16
+SIGNATURE_DTYPE = np.dtype([
+    ("luma", np.uint8, (SIGNATURE_SIZE * SIGNATURE_SIZE,)),
+    ("histogram", np.float32, (HISTOGRAM_BINS,)),
+    ("color", np.float32, (3,)),  # Mean of each colour channel, 0-255
+    ("size", np.float64),
+    ("valid", bool),  # False if the frame was not decoded, so only its size is known
+    ("warns", bool)  # True if the frame has a frame warning, such as a dark image
+])
+
+DUPLICATE_DIFF = 0.002  # Mean luma difference below which two frames are the same
+DUPLICATE_COLOR_DIFF = 1.0  # Colour channel mean difference, 0-255, of the same frames
+DUPLICATE_SIZE_DIFF = 0.01  # Fraction two same frames' file sizes can differ by
+MOTION_DIFF = 0.005  # Mean luma difference above which neighbouring frames are moving
+FLICKER_DIFF = 0.2  # Histogram difference from both neighbours of a flicker frame
+FLICKER_RATIO = 3.0  # Times more a flicker frame differs than its neighbours do
+SIZE_DROP = 0.5  # Fraction smaller than its neighbours a frame can be
+SIZE_WINDOW = 2  # Number of frames on each side a frame's size is compared with
+SEQUENCE_CHECKS = ["size_drop", "duplicate", "flicker"]
+SIGNATURE_CHECKS = ["duplicate", "flicker"]  # Sequence checks that need decoded frames
+
+
+def get_frame_signature(image: np.ndarray) -> dict:
+    """
+    Gets a small signature of a frame. The full image is only read once, to shrink it.
+    Output dictionary format:
+    {
+        "luma": list of the 8x8 grayscale thumbnail values, 0-255, row by row
+        "histogram": list of the fraction of grayscale pixels in each of 16 bins
+        "color": list of the mean of each colour channel, 0-255, in the image's order
+    }
+
+    :param image: Numpy image array
+    :return: Dictionary of the signature, as JSON types so it can be cached
+    """
+    sample = cv2.resize(image, (SAMPLE_SIZE, SAMPLE_SIZE), interpolation=cv2.INTER_AREA)
+    # Grayscale thumbnails alone can't tell frames apart that only differ in colour
+    color = cv2.mean(sample)[:3 if sample.ndim == 3 else 1]
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+    luma = cv2.resize(sample, (SIGNATURE_SIZE, SIGNATURE_SIZE),
+                      interpolation=cv2.INTER_AREA)
+    histogram = np.bincount(sample.ravel() // (256 // HISTOGRAM_BINS),
+                            minlength=HISTOGRAM_BINS) / sample.size
+    return {
+        "luma": luma.ravel().tolist(),
+        "histogram": histogram.round(4).tolist(),
+        "color": np.resize(np.round(color, 2), 3).tolist()
+    }
+
+
+def to_signature_row(size: float, signature: Optional[dict] = None,
+                     warns: bool = False) -> np.void:
+    """
+    :param size: Size of the frame in megabytes
+    :param signature: Signature from get_frame_signature, or None if not decoded
+    :param warns: Whether the frame has any frame warning
+    :return: Row of SIGNATURE_DTYPE, to stack into a table with the rest of the sequence
+    """
+    row = np.zeros((), dtype=SIGNATURE_DTYPE)
+    row["size"] = size
+    row["warns"] = warns
+    if signature:
+        row["luma"] = signature["luma"]
+        row["histogram"] = signature["histogram"]
+        row["color"] = signature["color"]
+        row["valid"] = True
+    return row[()]
+
+
+def find_size_drops(sizes: np.ndarray) -> np.ndarray:
+    """
+    Compares each frame's size with the median size of the frames around it.
+
+    :param sizes: Size of each frame of a sequence, in frame order
+    :return: Fraction each frame is smaller than its neighbours. Negative if larger.
+    """
+    # Each row is a frame's window of neighbours, padded with nan past the ends
+    padded = np.pad(sizes, SIZE_WINDOW, constant_values=np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * SIZE_WINDOW + 1)
+    neighbours = np.delete(windows, SIZE_WINDOW, axis=1)
+    return 1 - sizes / np.nanmedian(neighbours, axis=1)
+
+
+def find_sequence_anomalies(names: List[str], table: np.ndarray,
+                            checks: Optional[Iterable[str]] = None,
+                            adjacent_only: bool = False) -> Dict[str, List[str]]:
+    """
+    Flags frames that stand out from the frames next to them. Every comparison is
+    between neighbouring rows of the table, so it is done in a few array operations.
+
+    Checks:
+    "size_drop" - Much smaller than the frames around it.
+    "duplicate" - Same as the previous frame, in brightness, colour and file size, while
+        the frames around them move. Ex: The renderer reused the previous output.
+    "flicker" - Brightness is far off from both neighbours, which agree with each other
+        and aren't broken themselves.
+
+    Frames that were not decoded are only checked for size drops, and are left out of
+    the other checks so they don't make their neighbours stand out. Frames with frame
+    warnings or size drops don't count as motion around a duplicate, so a broken
+    neighbour doesn't make a hold look like a duplicate.
+
+    :param names: Names of the frames of a sequence, in frame order
+    :param table: Signatures of the frames, rows of SIGNATURE_DTYPE
+    :param checks: Names of the checks that are turned on. Default is all of
+        SEQUENCE_CHECKS.
+    :param adjacent_only: Only look for duplicates among decoded frames that are next to
+        each other in the table. Used when only a sample of the frames was decoded, as
+        samples far apart don't show whether a frame repeats. Flicker is always only
+        judged between frames that are next to each other, since an undecoded frame
+        between two neighbours could be the one that flickers.
+    :return: Dictionary of frame name to its warnings, in frame order. Frames without
+        warnings are left out.
+    """
+    checks = set(SEQUENCE_CHECKS if checks is None else checks)
+    warnings = {}
+    if len(names) < 2:
+        return warnings
+
+    drops = find_size_drops(table["size"])
+    if "size_drop" in checks:
+        for i in np.flatnonzero(drops >= SIZE_DROP):
+            warnings.setdefault(names[i], []).append(
+                f"File size drop - {drops[i] * 100:.0f}% smaller than neighbouring frames")
+
+    valid = np.flatnonzero(table["valid"])
+    if len(valid) < 3:
+        return {name: warnings[name] for name in names if name in warnings}
+    luma = table["luma"][valid].astype(np.float32) / 255
+    histograms = table["histogram"][valid]
+    sizes = table["size"][valid]
+    broken = table["warns"][valid] | (drops[valid] >= SIZE_DROP)
+
+    # Differences between each frame and the next. The perceptual hash is each
+    # thumbnail pixel compared with the thumbnail's median.
+    luma_diffs = np.abs(np.diff(luma, axis=0)).mean(axis=1)
+    hashes = luma > np.median(luma, axis=1, keepdims=True)
+    hash_diffs = (hashes[1:] != hashes[:-1]).sum(axis=1)
+    neighbours = np.diff(valid) == 1
+    adjacent = neighbours if adjacent_only else np.ones(len(valid) - 1, dtype=bool)
+    luma_diffs = np.where(adjacent, luma_diffs, 0)
+    color_diffs = np.abs(np.diff(table["color"][valid], axis=0)).max(axis=1)
+    size_diffs = np.abs(np.diff(sizes)) / np.maximum(sizes[1:], sizes[:-1])
+
+    # Duplicates are only flagged when the frame pairs around them move, so holds
+    # aren't flagged. Pairs with a broken frame aren't motion.
+    motion_diffs = np.where(broken[1:] | broken[:-1], 0, luma_diffs)
+    around_diffs = np.maximum(np.pad(motion_diffs[:-1], (1, 0)),
+                              np.pad(motion_diffs[1:], (0, 1)))
+    duplicates = (luma_diffs <= DUPLICATE_DIFF) & (hash_diffs == 0) & adjacent & \
+                 (color_diffs <= DUPLICATE_COLOR_DIFF) & \
+                 (size_diffs <= DUPLICATE_SIZE_DIFF) & \
+                 (around_diffs >= MOTION_DIFF) & ("duplicate" in checks)
+    for i in np.flatnonzero(duplicates):
+        warnings.setdefault(names[valid[i + 1]], []).append(
+            f"Duplicate frame - Same as {names[valid[i]]}")
+
+    # Histogram differences are the fraction of pixels that changed brightness bins.
+    # A flicker frame differs from both neighbours much more than they differ from each
+    # other. Neighbours that are broken themselves, such as two black frames around a
+    # good one, or that are further away than the next frame, don't make it a flicker
+    # frame.
+    histogram_diffs = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 2
+    skip_diffs = np.abs(histograms[2:] - histograms[:-2]).sum(axis=1) / 2
+    neighbour_diffs = np.minimum(histogram_diffs[:-1], histogram_diffs[1:])
+    flickers = (neighbour_diffs >= FLICKER_DIFF) & neighbours[:-1] & neighbours[1:] & \
+               ~broken[:-2] & ~broken[2:] & \
+               (neighbour_diffs >= FLICKER_RATIO * skip_diffs) & ("flicker" in checks)
+    for i in np.flatnonzero(flickers):
+        warnings.setdefault(names[valid[i + 1]], []).append(
+            f"Flicker - {neighbour_diffs[i] * 100:.0f}% of pixels differ in brightness "
+            f"from both neighbouring frames")
+    return {name: warnings[name] for name in names if name in warnings}
@@ -0,0 +1,210 @@
+"""
+Watches a render output directory for frames that are new or were rewritten, so they can
+be analyzed as they land instead of after the whole render finishes.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+DEFAULT_POLL_SECONDS = 0.5  # Time between checks of the directory
+DEFAULT_SETTLE_SECONDS = 1.0  # Time a frame's size must stay the same to count as written
+
+# inotify flags, see 'man inotify'
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_Q_OVERFLOW = 0x4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len, followed by the name
+
+
+class Inotify:
+    """
+    Minimal wrapper of the Linux inotify API through libc, reporting files in a
+    directory that were closed after writing or moved in.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory to watch
+        :raises OSError: If inotify is not available
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "Could not start inotify")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory),
+                                  IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Could not watch {directory}")
+
+    def read(self, timeout: float) -> Tuple[List[str], bool]:
+        """
+        Waits for events.
+
+        :param timeout: Seconds to wait for events
+        :return: Tuple of the names of files written, and whether events were dropped
+            because too many came in at once
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return [], False
+
+        data = os.read(self.fd, 65536)
+        names, overflowed = [], False
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+            elif name:
+                names.append(os.fsdecode(name))
+        return names, overflowed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FrameWatcher:
+    """
+    Finds frames in a directory that are new, or were rewritten, since they were last
+    returned, once they have finished being written. Each version of a frame is only
+    returned once.
+
+    On Linux, inotify reports frames as soon as the renderer closes them. Elsewhere, or
+    if inotify is not available, the directory is polled and a frame counts as written
+    once its size and modification time stay the same for settle_seconds.
+    Frames already in the directory when watching starts are always checked this way.
+    """
+
+    def __init__(self, directory: str, ext: str,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS,
+                 settle_seconds: float = DEFAULT_SETTLE_SECONDS, use_inotify: bool = True):
+        """
+        :param directory: Directory of frames
+        :param ext: File extension of frames
+        :param poll_seconds: Time between checks of the directory
+        :param settle_seconds: Time a polled frame must stay unchanged to count as written
+        :param use_inotify: Use inotify if it is available
+        """
+        self.directory = Path(directory)
+        self.suffix = f".{ext}"
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.returned = {}  # Frame name to the (size, mtime) it was returned with
+        self.pending = {}  # Frame name to its last (size, mtime) and when that was seen
+
+        self.inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self.inotify = Inotify(str(directory))
+            except OSError:
+                pass
+        self.scan()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_version(self, name: str) -> Optional[Tuple[int, int]]:
+        """
+        :param name: Frame name
+        :return: Tuple of the size and modification time of the frame, or None if it
+            no longer exists
+        """
+        try:
+            stat = (self.directory / name).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def scan(self) -> None:
+        """
+        Adds every frame in the directory that changed since it was returned to the
+        pending frames.
+        """
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.suffix) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                version = stat.st_size, stat.st_mtime_ns
+                if version != self.returned.get(entry.name) and \
+                        entry.name not in self.pending:
+                    self.pending[entry.name] = version, time.monotonic()
+
+    def poll(self, timeout: float) -> List[Path]:
+        """
+        Waits for frames to finish being written.
+
+        :param timeout: Seconds to wait
+        :return: Paths of frames that finished being written, sorted by name
+        """
+        written: Set[str] = set()
+        if self.inotify:
+            names, overflowed = self.inotify.read(timeout)
+            written.update(name for name in names if name.endswith(self.suffix))
+            if overflowed:
+                self.scan()
+        else:
+            time.sleep(timeout)
+            self.scan()
+
+        # Frames still being written by the time they were polled need to settle first
+        now = time.monotonic()
+        for name, (version, since) in list(self.pending.items()):
+            new_version = self.get_version(name)
+            if new_version is None:
+                del self.pending[name]
+            elif new_version != version:
+                self.pending[name] = new_version, now
+            elif now - since >= self.settle_seconds:
+                written.add(name)
+
+        ready = []
+        for name in sorted(written):
+            self.pending.pop(name, None)
+            version = self.get_version(name)
+            if version is not None and version != self.returned.get(name):
+                self.returned[name] = version
+                ready.append(self.directory / name)
+        return ready
+
+    def watch(self, idle_timeout: Optional[float] = None) -> Iterator[List[Path]]:
+        """
+        Yields batches of frames as they finish being written. Stops on Ctrl+C.
+
+        :param idle_timeout: Stop once no frame has been written for this many seconds.
+            Default is to never stop.
+        :return: Iterator of lists of frame paths
+        """
+        last_frame_time = time.monotonic()
+        try:
+            while True:
+                frames = self.poll(self.poll_seconds)
+                if frames:
+                    last_frame_time = time.monotonic()
+                    yield frames
+                elif idle_timeout is not None and not self.pending and \
+                        time.monotonic() - last_frame_time >= idle_timeout:
+                    return
+        except KeyboardInterrupt:
+            return
+
+    def close(self) -> None:
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
@@ -0,0 +1,153 @@
+"""
+Generates synthetic frame sequences named by the naming convention, mixing normal frames
+with the kinds of broken frames brokenFrames.py looks for. Used for benchmarking.
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from brokenFrames import NAMING_CONVENTION_TXT, load_naming_convention
+from frameIndex import FRAME_WORD
+
+FRAME_KINDS = ["normal", "black", "partial_black", "tiny", "truncated"]
+DEFAULT_MIX = {
+    "normal": 0.8,
+    "black": 0.05,
+    "partial_black": 0.05,
+    "tiny": 0.05,
+    "truncated": 0.05
+}
+TINY_SIZE = 8  # Width and height of tiny frames
+TINT_DRIFT = 0.002  # Largest change in tint from one frame to the next
+
+
+def get_frame_kinds(count: int, mix: Dict[str, float], seed: int = 0) -> List[str]:
+    """
+    Picks the kind of each frame. The same count, mix and seed always give the same
+    kinds.
+
+    :param count: Number of frames
+    :param mix: Dictionary of frame kind to the fraction of frames of that kind
+    :param seed: Random seed
+    :return: List of the kind of each frame
+    """
+    rng = np.random.default_rng(seed)
+    kinds = list(mix)
+    weights = np.array([mix[kind] for kind in kinds], dtype=float)
+    picks = rng.choice(len(kinds), size=count, p=weights / weights.sum())
+    return [kinds[i] for i in picks]
+
+
+def create_frame(kind: str, width: int, height: int, bit_depth: int,
+                 rng: np.random.Generator, tint: np.ndarray) -> np.ndarray:
+    """
+    Creates the image of a frame. Normal frames are a noisy gradient, so they compress
+    about as well as a render would.
+
+    :param kind: Kind of frame, one of FRAME_KINDS
+    :param width: Width of the frame
+    :param height: Height of the frame
+    :param bit_depth: 8 or 16 bits per channel
+    :param rng: Random number generator
+    :param tint: Colour of the gradient, 0-1 for each channel. Shared by the frames of
+        a sequence, so only the broken kinds stand out from their neighbours.
+    :return: Numpy image array
+    """
+    max_value = 2 ** bit_depth - 1
+    dtype = np.uint8 if bit_depth == 8 else np.uint16
+    if kind == "black":
+        return np.zeros((height, width, 3), dtype=dtype)
+    if kind == "tiny":
+        width = height = TINY_SIZE
+
+    # Horizontal gradient with the sequence's tint and some noise
+    gradient = np.linspace(0.2, 0.9, width, dtype=np.float32)
+    image = gradient[None, :, None] * tint.astype(np.float32)[None, None, :]
+    image = np.repeat(image, height, axis=0)
+    image += rng.normal(0, 0.02, size=image.shape).astype(np.float32)
+    image = (np.clip(image, 0, 1) * max_value).astype(dtype)
+
+    if kind == "partial_black":
+        image[height // 2:] = 0
+    return image
+
+
+def generate_sequence(output_dir: str, count: int, width: int = 1920, height: int = 1080,
+                      bit_depth: int = 8, mix: Dict[str, float] = None, seed: int = 0,
+                      naming_txt_path: str = NAMING_CONVENTION_TXT,
+                      start_frame: int = 1000) -> Dict[str, str]:
+    """
+    Writes a synthetic frame sequence and a manifest.json listing the kind of each frame.
+
+    :param output_dir: Directory to write frames to. Created if it doesn't exist.
+    :param count: Number of frames
+    :param width: Width of the frames
+    :param height: Height of the frames
+    :param bit_depth: 8 or 16 bits per channel
+    :param mix: Dictionary of frame kind to the fraction of frames of that kind.
+        Default is DEFAULT_MIX.
+    :param seed: Random seed. The same arguments and seed always give the same frames.
+    :param naming_txt_path: Path to the naming convention .txt file
+    :param start_frame: Number of the first frame
+    :return: Dictionary of frame name to frame kind
+    """
+    name_words, ext = load_naming_convention(naming_txt_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    kinds = get_frame_kinds(count, mix or DEFAULT_MIX, seed)
+    # One tint for the sequence that only drifts slightly, like a continuous shot
+    tint = rng.uniform(0.5, 1.0, size=3)
+    manifest = {}
+    for i, kind in enumerate(kinds):
+        # Frame word gets the frame number, every other word is '001'
+        words = [f"{start_frame + i:04d}" if word == FRAME_WORD else "001"
+                 for word in name_words]
+        file = output_dir / f"{'_'.join(words)}.{ext}"
+
+        tint = np.clip(tint + rng.uniform(-TINT_DRIFT, TINT_DRIFT, size=3), 0.5, 1.0)
+        cv2.imwrite(str(file), create_frame(kind, width, height, bit_depth, rng, tint))
+        if kind == "truncated":
+            # Cut the file off partway, like a render that died while writing
+            data = file.read_bytes()
+            file.write_bytes(data[:len(data) // 2])
+        manifest[file.name] = kind
+
+    with open(output_dir / "manifest.json", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=4)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This script generates a synthetic frame sequence named by the naming "
+                    "convention, mixing normal, black, partially black, tiny and truncated "
+                    "frames.")
+    parser.add_argument("output_dir", help="Directory to write frames to", type=str)
+    parser.add_argument("--count", help="Number of frames. Default is '100'",
+                        type=int, default=100)
+    parser.add_argument("--width", help="Width of the frames. Default is '1920'",
+                        type=int, default=1920)
+    parser.add_argument("--height", help="Height of the frames. Default is '1080'",
+                        type=int, default=1080)
+    parser.add_argument("--bit_depth", help="Bits per channel. Default is '8'",
+                        type=int, choices=[8, 16], default=8)
+    parser.add_argument("--seed", help="Random seed. Default is '0'", type=int, default=0)
+    parser.add_argument("--naming", help="Path to the naming convention .txt file. "
+                                         f"Default is '{NAMING_CONVENTION_TXT}'",
+                        type=str, default=NAMING_CONVENTION_TXT)
+    for frame_kind in FRAME_KINDS:
+        parser.add_argument(f"--{frame_kind}", help=f"Fraction of {frame_kind} frames. "
+                                                    f"Default is '{DEFAULT_MIX[frame_kind]}'",
+                            type=float, default=DEFAULT_MIX[frame_kind])
+    args = parser.parse_args()
+
+    frame_mix = {frame_kind: getattr(args, frame_kind) for frame_kind in FRAME_KINDS}
+    generate_sequence(args.output_dir, args.count, args.width, args.height, args.bit_depth,
+                      frame_mix, args.seed, args.naming)
+    print(f"Generated {args.count} frames in '{args.output_dir}'")
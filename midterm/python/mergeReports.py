@@ -0,0 +1,78 @@
+"""
+Merges reports saved by brokenFrames.py with '--report_out', such as the reports of each
+shard of a show, into one report and one grid of thumbnails.
+"""
+import argparse
+import os
+
+from brokenFrames import (create_warning_image_grid, load_partial_report,
+                          print_gap_report, print_image_report)
+from contactSheet import DEFAULT_PAGE_SIZE
+
+
+def merge_reports(reports: list) -> dict:
+    """
+    Combines reports into one. Frames are ordered by directory, the same order as a
+    single recursive run.
+
+    :param reports: Reports from load_partial_report
+    :return: Report dictionary in the same format
+    """
+    frames, gaps, gap_pads = {}, {}, {}
+    for report in reports:
+        frames.update(report["frames"])
+        gaps.update(report["gaps"])
+        gap_pads.update(report["gap_pads"])
+
+    # Sorting is stable, so frames of a directory stay in the order they were analyzed
+    frame_names = sorted(frames, key=os.path.dirname)
+    return {
+        "frames": {name: frames[name] for name in frame_names},
+        "gaps": {seq_name: gaps[seq_name] for seq_name in sorted(gaps)},
+        "gap_pads": gap_pads
+    }
+
+
+def find_missing_shards(reports: list) -> list:
+    """
+    Finds shards that have no report.
+
+    :param reports: Reports from load_partial_report
+    :return: List of missing shards as 'i/N'
+    """
+    shards = {report["shard"] for report in reports if report["shard"]}
+    shard_cnts = {int(shard.split("/")[1]) for shard in shards}
+    return [f"{i}/{shard_cnt}" for shard_cnt in sorted(shard_cnts)
+            for i in range(shard_cnt) if f"{i}/{shard_cnt}" not in shards]
+
+
+def main():
+    """
+    Loads each report then prints the merged warnings and saves the merged grid
+    """
+    reports = [load_partial_report(report_path) for report_path in args.reports]
+    for shard in find_missing_shards(reports):
+        print(f"Missing report of shard {shard}")
+
+    report = merge_reports(reports)
+    for file_name, im_info in report["frames"].items():
+        print_image_report(file_name, im_info)
+    print_gap_report(report["gaps"], report["gap_pads"])
+    create_warning_image_grid(report["frames"], args.grid_name, args.grid_page_size)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="This tool merges the .json reports of several brokenFrames.py runs. "
+                    "Ex: Run brokenFrames.py with '--recursive --shard i/N --report_out "
+                    "shard_i.json' on N machines, then merge the shard_*.json files.")
+    parser.add_argument("reports", help="Report .json files to merge", type=str, nargs="+")
+    parser.add_argument("--grid_name", help="Name of the grid image to save. Default is "
+                                            "'warningImageThumbnails.jpg'",
+                        type=str, default="warningImageThumbnails.jpg")
+    parser.add_argument("--grid_page_size", help="Number of thumbnails per grid image. "
+                                                 f"Default is '{DEFAULT_PAGE_SIZE}'",
+                        type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    main()
@@ -0,0 +1,128 @@
+"""
+Checks the chunk structure of PNG files without decoding their pixels, to catch frames
+that were truncated or corrupted while being written or copied.
+PNG specification: https://www.w3.org/TR/png/#5DataRep
+"""
+import struct
+import zlib
+from pathlib import Path
+from typing import Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHUNK_HEADER = struct.Struct(">I4s")  # Chunk data length and chunk type
+IHDR_DATA = struct.Struct(">IIBBBBB")  # Width, height, bit depth, color type, ...
+CRC_SIZE = 4
+READ_BLOCK_SIZE = 1048576  # Size of reads when verifying CRCs of large chunks
+# Allowed bit depths of each color type
+COLOR_TYPE_BIT_DEPTHS = {
+    0: (1, 2, 4, 8, 16),  # Grayscale
+    2: (8, 16),  # RGB
+    3: (1, 2, 4, 8),  # Palette
+    4: (8, 16),  # Grayscale and alpha
+    6: (8, 16)  # RGBA
+}
+
+
+class PngStructureError(ValueError):
+    """
+    Raised when a PNG file is truncated or its chunk structure is invalid.
+    """
+
+
+def check_png_structure(file: Path, verify_crc: bool = False) -> Tuple[int, int]:
+    """
+    Walks the chunks of a PNG file and checks that the IHDR chunk is valid, image data
+    is present and the IEND chunk ends the file. Chunk data is skipped over unless
+    CRCs are verified, so pixels are never inflated.
+
+    :param file: PNG file to check
+    :param verify_crc: Also verify the CRC of every chunk. This reads the whole file.
+    :return: Tuple of the image width and height
+    :raises PngStructureError: If the file is truncated or corrupt
+    """
+    with open(file, "rb") as png:
+        if png.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            raise PngStructureError("Missing PNG signature")
+
+        dims = None
+        has_idat = False
+        while True:
+            header = png.read(CHUNK_HEADER.size)
+            if not header:
+                raise PngStructureError("Truncated before IEND chunk")
+            if len(header) < CHUNK_HEADER.size:
+                raise PngStructureError("Truncated chunk header")
+            length, chunk_type = CHUNK_HEADER.unpack(header)
+
+            # The IHDR chunk must come first
+            if dims is None:
+                if chunk_type != b"IHDR":
+                    raise PngStructureError("Missing IHDR chunk")
+                dims = _read_ihdr(png, length, verify_crc)
+                continue
+
+            if chunk_type == b"IDAT":
+                has_idat = True
+            elif chunk_type == b"IEND":
+                if not has_idat:
+                    raise PngStructureError("Missing IDAT chunk")
+                _skip_chunk(png, chunk_type, length, verify_crc)
+                if png.read(1):
+                    raise PngStructureError("Data after IEND chunk")
+                return dims
+
+            _skip_chunk(png, chunk_type, length, verify_crc)
+
+
+def _read_ihdr(png, length: int, verify_crc: bool) -> Tuple[int, int]:
+    """
+    Reads and validates the IHDR chunk.
+
+    :return: Tuple of the image width and height
+    """
+    if length != IHDR_DATA.size:
+        raise PngStructureError(f"Invalid IHDR length: {length}")
+    data = png.read(length)
+    crc = png.read(CRC_SIZE)
+    if len(crc) < CRC_SIZE:
+        raise PngStructureError("Truncated IHDR chunk")
+    if verify_crc and zlib.crc32(b"IHDR" + data) != int.from_bytes(crc, "big"):
+        raise PngStructureError("Bad CRC in IHDR chunk")
+
+    width, height, bit_depth, color_type, compression, filter_method, interlace = \
+        IHDR_DATA.unpack(data)
+    if not 0 < width < 2 ** 31 or not 0 < height < 2 ** 31:
+        raise PngStructureError(f"Invalid dimensions: {width}x{height}")
+    if bit_depth not in COLOR_TYPE_BIT_DEPTHS.get(color_type, ()):
+        raise PngStructureError(f"Invalid color type {color_type} "
+                                f"with bit depth {bit_depth}")
+    if compression != 0 or filter_method != 0 or interlace not in (0, 1):
+        raise PngStructureError("Invalid IHDR compression, filter or interlace method")
+    return width, height
+
+
+def _skip_chunk(png, chunk_type: bytes, length: int, verify_crc: bool) -> None:
+    """
+    Moves past the data and CRC of a chunk, verifying the CRC if asked to.
+    """
+    name = chunk_type.decode("latin-1")
+    if not verify_crc:
+        # Seek to the last byte of the chunk and read it to make sure it exists
+        png.seek(length + CRC_SIZE - 1, 1)
+        if not png.read(1):
+            raise PngStructureError(f"Truncated {name} chunk")
+        return
+
+    crc = zlib.crc32(chunk_type)
+    remaining = length
+    while remaining:
+        block = png.read(min(remaining, READ_BLOCK_SIZE))
+        if not block:
+            raise PngStructureError(f"Truncated {name} chunk")
+        crc = zlib.crc32(block, crc)
+        remaining -= len(block)
+    expected_crc = png.read(CRC_SIZE)
+    if len(expected_crc) < CRC_SIZE:
+        raise PngStructureError(f"Truncated {name} chunk")
+    if crc != int.from_bytes(expected_crc, "big"):
+        raise PngStructureError(f"Bad CRC in {name} chunk")